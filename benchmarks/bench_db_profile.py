@@ -0,0 +1,100 @@
+"""
+Concurrent write benchmark for the SQLite engine profiles in src/db.py.
+
+Runs the same mixed workload (reserve / increase / availability) from
+several threads against a fresh database file per profile and reports
+throughput, latency percentiles and "database is locked" failures.
+
+    python -m benchmarks.bench_db_profile --threads 8 --ops 300
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from src.db import Base, InventoryRepositoryDB, create_db_engine
+from src.domain.inventory import ConcurrencyConflict
+from src.services.inventory_service import InventoryService
+
+
+def run_profile(profile: str, threads: int, ops: int, skus: int) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    url = f"sqlite:///{path}"
+    writer = create_db_engine(url, profile)
+    reader = create_db_engine(url, profile, read_only=True) if profile != "default" else writer
+    Base.metadata.create_all(writer)
+
+    repo = InventoryRepositoryDB(sessionmaker(bind=writer), sessionmaker(bind=reader))
+    service = InventoryService(repo)
+    for i in range(skus):
+        service.create_item(f"SKU-{i}", 1_000_000, "pcs", 10)
+
+    latencies, errors = [], {"locked": 0, "conflict": 0}
+    lock = threading.Lock()
+
+    def worker(seed):
+        rnd = random.Random(seed)
+        local = []
+        for n in range(ops):
+            sku = f"SKU-{rnd.randrange(skus)}"
+            start = time.perf_counter()
+            try:
+                roll = rnd.random()
+                if roll < 0.5:
+                    service.reserve_stock(sku, f"ORD-{seed}-{n}", 1)
+                elif roll < 0.7:
+                    service.increase_stock(sku, 1, "INBOUND")
+                else:
+                    service.get_availability(sku)
+            except OperationalError:
+                with lock:
+                    errors["locked"] += 1
+                continue
+            except ConcurrencyConflict:
+                with lock:
+                    errors["conflict"] += 1
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "profile": profile,
+        "ok_ops": len(latencies),
+        "ops_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2) if latencies else None,
+        "locked_errors": errors["locked"],
+        "conflicts": errors["conflict"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=300, help="operations per thread")
+    parser.add_argument("--skus", type=int, default=20)
+    parser.add_argument("--profiles", nargs="+", default=["default", "wal"])
+    args = parser.parse_args()
+
+    for profile in args.profiles:
+        print(run_profile(profile, args.threads, args.ops, args.skus))
+
+
+if __name__ == "__main__":
+    main()
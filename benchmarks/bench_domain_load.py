@@ -0,0 +1,65 @@
+"""
+Domain mapping benchmark: build InventoryItem aggregates from DB-shaped
+rows (no database involved) and report time and peak traced memory.
+
+    python -m benchmarks.bench_domain_load --reservations 1000000 --items 1000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from src.db import _models_to_domain
+from src.domain.inventory import DEFAULT_LOCATION
+
+
+def make_rows(items: int, reservations: int):
+    item_rows = [
+        SimpleNamespace(id=f"id-{i}", sku=f"SKU-{i}", on_hand=10_000_000, reserved=reservations // items * 3,
+                        uom="pcs", min_qty=10, version=1, location=DEFAULT_LOCATION)
+        for i in range(items)
+    ]
+    reservation_rows = [
+        SimpleNamespace(id=f"res-{n}", order_id=f"ORD-{n}", sku=f"SKU-{n % items}", qty=1 + n % 5,
+                        location=DEFAULT_LOCATION, created_at=None, expires_at=None)
+        for n in range(reservations)
+    ]
+    return item_rows, reservation_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--reservations", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    item_rows, reservation_rows = make_rows(args.items, args.reservations)
+    gc.collect()
+
+    start = time.perf_counter()
+    items = _models_to_domain(item_rows, reservation_rows)
+    elapsed = time.perf_counter() - start
+    del items
+    gc.collect()
+
+    # run terpisah untuk memory: tracemalloc memperlambat alokasi
+    tracemalloc.start()
+    items = _models_to_domain(item_rows, reservation_rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # baca available berulang, seperti cek reserve / low stock
+    start = time.perf_counter()
+    for _ in range(100):
+        for item in items:
+            item.is_low_stock()
+    reads = time.perf_counter() - start
+
+    print(f"items={args.items} reservations={args.reservations}")
+    print(f"map:   {elapsed:.2f}s  peak {peak / 2**20:.0f} MiB ({peak / args.reservations:.0f} B/reservation)")
+    print(f"reads: {reads * 1000:.1f}ms for {100 * args.items} is_low_stock() calls")
+
+
+if __name__ == "__main__":
+    main()
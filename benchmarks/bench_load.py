@@ -0,0 +1,140 @@
+"""
+In-process load generator: drives the FastAPI app (src.main.app) through
+httpx.ASGITransport - full routing, auth, validation and DB, no network -
+with a weighted traffic mix, and reports p50/p99 latency per endpoint and
+overall throughput. Results go to benchmarks/results/ as JSON.
+
+Mixes (operation weights):
+- checkout: mostly reserves, availability checks before each order
+- browse:   availability-heavy storefront traffic
+- manager:  low-stock dashboards next to background reserves
+
+The app runs against a fresh SQLite file (DATABASE_URL is set before
+src.main is imported); the reservation sweeper is disabled.
+
+    python -m benchmarks.bench_load --mix checkout --concurrency 32 --requests 5000
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+
+import httpx
+
+# src.main dibaca di main_async(), setelah configure_environment() men-set DATABASE_URL
+from benchmarks.results import latency_summary, write_results
+
+MIXES = {
+    "checkout": {"reserve": 0.55, "availability": 0.40, "low_stock": 0.05},
+    "browse": {"reserve": 0.08, "availability": 0.90, "low_stock": 0.02},
+    "manager": {"reserve": 0.20, "availability": 0.40, "low_stock": 0.40},
+}
+
+
+def configure_environment():
+    path = os.path.join(tempfile.mkdtemp(), "load.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ.pop("DATABASE_READ_URL", None)
+    os.environ["RESERVATION_SWEEP_INTERVAL_SECONDS"] = "0"
+
+
+async def login(client, role: str) -> dict:
+    username = f"bench-{role}-{uuid.uuid4().hex[:6]}"
+    await client.post("/auth/register", json={"username": username, "password": "bench", "role": role})
+    response = await client.post("/auth/login", data={"username": username, "password": "bench"})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def seed(client, headers: dict, skus: int):
+    for i in range(skus):
+        # tiap SKU ke-10 di bawah threshold -> low-stock tidak kosong
+        min_qty = 2_000_000 if i % 10 == 0 else 10
+        response = await client.post(
+            "/admin/items",
+            json={"sku": f"LOAD-{i:05d}", "initial_qty": 1_000_000, "uom": "pcs", "min_qty": min_qty},
+            headers=headers,
+        )
+        response.raise_for_status()
+
+
+def request_for(op: str, rnd: random.Random, skus: int, seq: int):
+    sku = f"LOAD-{rnd.randrange(skus):05d}"
+    if op == "reserve":
+        return "POST", f"/ohs/{sku}/reserve", {"order_id": f"ORD-{seq}", "qty": 1}
+    if op == "availability":
+        return "GET", f"/ohs/availability/{sku}", None
+    return "GET", "/manager/low-stock?limit=50", None
+
+
+async def run_load(client, tokens: dict, mix: dict, skus: int, requests: int, concurrency: int, seed_value: int):
+    ops, weights = zip(*mix.items())
+    role_for = {"reserve": "client", "availability": "client", "low_stock": "manager"}
+    latencies = defaultdict(list)
+    statuses = defaultdict(Counter)
+    counter = iter(range(requests))
+
+    async def worker(worker_id: int):
+        rnd = random.Random(seed_value + worker_id)
+        for seq in counter:
+            op = rnd.choices(ops, weights)[0]
+            method, url, body = request_for(op, rnd, skus, seq)
+            start = time.perf_counter()
+            response = await client.request(method, url, json=body, headers=tokens[role_for[op]])
+            latencies[op].append(time.perf_counter() - start)
+            statuses[op][response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+async def main_async(args) -> list:
+    from src.db_async import dispose_async_engines
+    from src.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        tokens = {role: await login(client, role) for role in ("admin", "client", "manager")}
+        await seed(client, tokens["admin"], args.skus)
+        if args.warmup:
+            await run_load(client, tokens, MIXES[args.mix], args.skus, args.warmup, args.concurrency, -1)
+        latencies, statuses, elapsed = await run_load(
+            client, tokens, MIXES[args.mix], args.skus, args.requests, args.concurrency, args.seed
+        )
+    await dispose_async_engines()
+
+    cases = [
+        {"name": f"{args.mix}.{op}", **latency_summary(values), "status": dict(statuses[op])}
+        for op, values in sorted(latencies.items())
+    ]
+    all_latencies = [v for values in latencies.values() for v in values]
+    cases.append({"name": f"{args.mix}.all", **latency_summary(all_latencies, elapsed)})
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mix", choices=sorted(MIXES), default="checkout")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--skus", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=200, help="requests before measuring (0 = none)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="output JSON path (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    configure_environment()
+    cases = asyncio.run(main_async(args))
+    for case in cases:
+        print(case)
+    print("results:", write_results("load", vars(args), cases, args.out))
+
+
+if __name__ == "__main__":
+    main()
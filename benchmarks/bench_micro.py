@@ -0,0 +1,135 @@
+"""
+Micro-benchmarks for the inventory hot paths, one case per (operation, size):
+
+- domain.reserve_release:   InventoryItem.reserve + release on one aggregate
+- mapping.models_to_domain: DB rows -> InventoryItem (inventory_model_to_domain)
+- repo.list_all:            InventoryRepositoryDB.list_all over the whole table
+- repo.save:                load one item, increase, InventoryRepositoryDB.save
+
+Each size gets a fresh SQLite file (profile wal) seeded with that many
+items (one reservation per 10 items). Results go to benchmarks/results/
+as JSON (see benchmarks/results.py).
+
+    python -m benchmarks.bench_micro --sizes 1000 100000 1000000
+"""
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+import uuid
+from types import SimpleNamespace
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.results import latency_summary, write_results
+from src.db import Base, InventoryItemModel, InventoryRepositoryDB, ReservationModel, _models_to_domain, create_db_engine
+from src.domain.inventory import DEFAULT_LOCATION, InventoryItem, Quantity, SKU, Threshold
+
+SEED_CHUNK = 10_000
+
+
+def bench_reserve_release(ops: int) -> dict:
+    item = InventoryItem(id="bench", sku=SKU("BENCH"), on_hand=Quantity(ops + 1), reserved=Quantity(0),
+                         threshold=Threshold(1))
+    qty = Quantity(1)
+    start = time.perf_counter()
+    for n in range(ops):
+        reservation = item.reserve(f"ORD-{n}", qty)
+        item.release(reservation.id)
+    elapsed = time.perf_counter() - start
+    return {"name": "domain.reserve_release", "size": ops, "seconds": round(elapsed, 4),
+            "ops_per_sec": round(ops / elapsed, 1), "us_per_op": round(elapsed / ops * 1e6, 3)}
+
+
+def bench_mapping(size: int, reservation_every: int) -> dict:
+    item_rows = [
+        SimpleNamespace(id=f"id-{i}", sku=f"SKU-{i:07d}", on_hand=100, reserved=5 if i % reservation_every == 0 else 0,
+                        uom="pcs", min_qty=10, version=1, location=DEFAULT_LOCATION)
+        for i in range(size)
+    ]
+    reservation_rows = [
+        SimpleNamespace(id=f"res-{i}", order_id=f"ORD-{i}", sku=f"SKU-{i:07d}", qty=5, location=DEFAULT_LOCATION,
+                        created_at=None, expires_at=None)
+        for i in range(0, size, reservation_every)
+    ]
+    gc.collect()
+    start = time.perf_counter()
+    items = _models_to_domain(item_rows, reservation_rows)
+    elapsed = time.perf_counter() - start
+    assert len(items) == size
+    return {"name": "mapping.models_to_domain", "size": size, "seconds": round(elapsed, 4),
+            "rows_per_sec": round(size / elapsed, 1)}
+
+
+def seed(engine, size: int, reservation_every: int):
+    with engine.begin() as conn:
+        for lo in range(0, size, SEED_CHUNK):
+            hi = min(lo + SEED_CHUNK, size)
+            conn.execute(insert(InventoryItemModel), [
+                {"id": str(uuid.uuid4()), "sku": f"SKU-{i:07d}", "on_hand": 100,
+                 "reserved": 5 if i % reservation_every == 0 else 0, "uom": "pcs", "min_qty": 10, "version": 1}
+                for i in range(lo, hi)
+            ])
+            conn.execute(insert(ReservationModel), [
+                {"id": str(uuid.uuid4()), "order_id": f"ORD-{i}", "sku": f"SKU-{i:07d}", "qty": 5}
+                for i in range(lo, hi) if i % reservation_every == 0
+            ])
+
+
+def bench_repository(size: int, reservation_every: int, saves: int) -> list:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_db_engine(f"sqlite:///{path}", "wal")
+    reader = create_db_engine(f"sqlite:///{path}", "wal", read_only=True)
+    Base.metadata.create_all(engine)
+    seed(engine, size, reservation_every)
+    repo = InventoryRepositoryDB(sessionmaker(bind=engine), sessionmaker(bind=reader))
+
+    gc.collect()
+    start = time.perf_counter()
+    items = repo.list_all()
+    list_elapsed = time.perf_counter() - start
+    assert len(items) == size
+    del items
+
+    rnd = random.Random(size)
+    latencies = []
+    for _ in range(saves):
+        item = repo.get_by_sku(f"SKU-{rnd.randrange(size):07d}")
+        item.increase(Quantity(1), "BENCH")
+        start = time.perf_counter()
+        repo.save(item)
+        latencies.append(time.perf_counter() - start)
+
+    engine.dispose()
+    reader.dispose()
+    return [
+        {"name": "repo.list_all", "size": size, "seconds": round(list_elapsed, 4),
+         "rows_per_sec": round(size / list_elapsed, 1)},
+        {"name": "repo.save", "size": size, **latency_summary(latencies)},
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--reservation-every", type=int, default=10, help="one reservation per N items")
+    parser.add_argument("--domain-ops", type=int, default=100_000)
+    parser.add_argument("--saves", type=int, default=200, help="repo.save samples per size")
+    parser.add_argument("--out", help="output JSON path (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    cases = [bench_reserve_release(args.domain_ops)]
+    for size in args.sizes:
+        cases.append(bench_mapping(size, args.reservation_every))
+        cases.extend(bench_repository(size, args.reservation_every, args.saves))
+
+    for case in cases:
+        print(case)
+    print("results:", write_results("micro", vars(args), cases, args.out))
+
+
+if __name__ == "__main__":
+    main()
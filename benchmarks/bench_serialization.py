@@ -0,0 +1,86 @@
+"""
+Listing serialization benchmark: legacy DTO path vs fast row path.
+
+Both paths read the same items (+ reservations) from a fresh SQLite file
+and produce the same JSON body as GET /admin/items:
+- dto:  repo.list_page -> domain -> to_item_dto -> response_model
+        validation (TypeAdapter) -> json.dumps, like FastAPI does
+- fast: repo.list_page_rows -> items_json (tuple rows -> orjson bytes)
+
+    python -m benchmarks.bench_serialization --items 100000 --repeat 3
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import uuid
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from src.db import Base, InventoryItemModel, InventoryRepositoryDB, ReservationModel, create_db_engine
+from src.schemas.inventory import InventoryItemDto
+from src.serialization import items_json, orjson, to_item_dto
+
+
+def seed(engine, items: int, reservation_every: int):
+    with engine.begin() as conn:
+        conn.execute(insert(InventoryItemModel), [
+            {"id": str(uuid.uuid4()), "sku": f"SKU-{i:07d}", "on_hand": 100, "reserved": 5 if i % reservation_every == 0 else 0,
+             "uom": "pcs", "min_qty": i % 150, "version": 1}
+            for i in range(items)
+        ])
+        conn.execute(insert(ReservationModel), [
+            {"id": str(uuid.uuid4()), "order_id": f"ORD-{i}", "sku": f"SKU-{i:07d}", "qty": 5}
+            for i in range(0, items, reservation_every)
+        ])
+
+
+def dto_path(repo, items: int) -> bytes:
+    adapter = TypeAdapter(List[InventoryItemDto])
+    dtos = [to_item_dto(i) for i in repo.list_page(limit=items)]
+    content = adapter.dump_python(adapter.validate_python(dtos), mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def fast_path(repo, items: int) -> bytes:
+    return items_json(*repo.list_page_rows(limit=items))
+
+
+def best_of(fn, repeat: int):
+    timings, body = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--reservation-every", type=int, default=10, help="one reservation per N items")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = create_db_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}", "wal")
+    Base.metadata.create_all(engine)
+    seed(engine, args.items, args.reservation_every)
+    repo = InventoryRepositoryDB(sessionmaker(bind=engine))
+
+    dto_s, dto_body = best_of(lambda: dto_path(repo, args.items), args.repeat)
+    fast_s, fast_body = best_of(lambda: fast_path(repo, args.items), args.repeat)
+    assert json.loads(dto_body) == json.loads(fast_body), "paths produced different JSON"
+
+    print(f"items={args.items} serializer={'orjson' if orjson else 'json'} body={len(fast_body) / 1e6:.1f} MB")
+    print(f"{'path':<6} {'best':>9} {'items/s':>12}")
+    for name, seconds in (("dto", dto_s), ("fast", fast_s)):
+        print(f"{name:<6} {seconds * 1000:>7.0f}ms {args.items / seconds:>12,.0f}")
+    print(f"speedup: {dto_s / fast_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Compare two benchmark result files written by benchmarks/results.py.
+
+Cases are matched by (name, size). For each shared numeric metric the
+relative change is printed; a metric that got worse by more than
+--threshold percent (latency/seconds up, throughput down) is flagged and
+makes the exit code 1, so the script can gate CI.
+
+    python -m benchmarks.compare benchmarks/results/load-OLD.json benchmarks/results/load-NEW.json
+"""
+import argparse
+import json
+import sys
+
+# metric yang lebih kecil = lebih baik; sisanya (ops_per_sec, rows_per_sec) lebih besar = lebih baik
+LOWER_IS_BETTER = ("_ms", "seconds", "us_per_op")
+IGNORED = {"size", "count"}
+# satu sampel terburuk terlalu noisy untuk gate: tetap dicetak, tidak di-flag
+NOT_GATED = {"max_ms"}
+
+
+def _cases(path: str) -> dict:
+    with open(path) as f:
+        payload = json.load(f)
+    return {(case["name"], case.get("size")): case for case in payload["cases"]}
+
+
+def _regressed(metric: str, change: float, threshold: float) -> bool:
+    if metric in NOT_GATED:
+        return False
+    if metric.endswith(LOWER_IS_BETTER):
+        return change > threshold
+    return change < -threshold
+
+
+def compare(old: dict, new: dict, threshold: float) -> list:
+    """Returns rows (case, metric, old, new, change %, regressed)."""
+    rows = []
+    for key in sorted(old.keys() & new.keys(), key=str):
+        for metric, old_value in old[key].items():
+            new_value = new[key].get(metric)
+            if metric in IGNORED or not isinstance(old_value, (int, float)) or not isinstance(new_value, (int, float)):
+                continue
+            change = (new_value - old_value) / old_value * 100 if old_value else 0.0
+            label = key[0] if key[1] is None else f"{key[0]}[{key[1]}]"
+            rows.append((label, metric, old_value, new_value, change, _regressed(metric, change, threshold)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    rows = compare(_cases(args.old), _cases(args.new), args.threshold)
+    for label, metric, old_value, new_value, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{label:<40} {metric:<14} {old_value:>12} -> {new_value:>12} {change:+7.1f}%{flag}")
+    sys.exit(1 if any(row[-1] for row in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
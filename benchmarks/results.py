@@ -0,0 +1,73 @@
+"""
+Shared helpers for benchmark results: latency summaries and JSON output.
+
+Every run is written as one JSON file (benchmark name, run metadata and
+the measured cases) so two runs can be diffed with
+`python -m benchmarks.compare OLD.json NEW.json`.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def latency_summary(latencies: List[float], elapsed: Optional[float] = None) -> dict:
+    """Seconds -> {count, p50_ms, p90_ms, p99_ms, max_ms[, ops_per_sec]}."""
+    values = sorted(latencies)
+    summary = {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p90_ms": round(percentile(values, 90) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+    if elapsed:
+        summary["ops_per_sec"] = round(len(values) / elapsed, 1)
+    return summary
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def write_results(benchmark: str, params: dict, cases: List[dict], out: Optional[str] = None) -> str:
+    """
+    Write {"benchmark", "meta", "params", "cases"} to `out`
+    (default: benchmarks/results/<benchmark>-<UTC timestamp>.json); returns the path.
+    Cases are matched by (name, size) in compare.py, so that pair must be unique.
+    """
+    now = datetime.now(timezone.utc)
+    if out is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, f"{benchmark}-{now:%Y%m%dT%H%M%SZ}.json")
+    payload = {
+        "benchmark": benchmark,
+        "meta": {
+            "timestamp": now.isoformat(),
+            "git_revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+        },
+        "params": params,
+        "cases": cases,
+    }
+    with open(out, "w") as f:
+        json.dump(payload, f, indent=2)
+    return out
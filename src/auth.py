@@ -1,14 +1,26 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional, Set
+from typing import Optional, Tuple
+from uuid import uuid4
+import hashlib
+import os
+import threading
+import time
 
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db import get_db, UserModel
+from src.db import UserModel
+from src.db_async import AsyncReadSessionLocal, AsyncSessionLocal
+from src.metrics import stage
+from src.passwords import password_hasher
+from src.profiling import note_principal
+from src.revocation import create_revocation_store
 
 # ==========================
 # JWT CONFIGURATION
@@ -17,12 +29,22 @@ SECRET_KEY = "SUPER_SECRET_KEY_CHANGE_THIS"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-# TOKEN BLACKLIST (logout)
-TOKEN_BLACKLIST: Set[str] = set()
+# TOKEN REVOCATION (logout), keyed by jti, shared antar worker
+revocation_store = create_revocation_store()
+
+
+# ==========================
+# PRINCIPAL CACHE
+# ==========================
+# Principal yang sudah terautentikasi di-cache per username, jadi request
+# berikutnya tidak perlu query users. Saat user di-disable / ganti role,
+# worker yang sama langsung invalidate; worker lain menerima broadcast lewat
+# revocation store (backend sql: paling lambat TOKEN_REVOCATION_SYNC_SECONDS).
+# TTL tetap jadi batas atas kalau broadcast tidak sampai.
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000"))
 
 
 class Token(BaseModel):
@@ -41,16 +63,61 @@ class UserInDB(User):
     hashed_password: str
 
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+class PrincipalCache:
+    """Bounded LRU cache with per-entry TTL, keyed by username. Thread-safe."""
+
+    def __init__(self, max_size: int = PRINCIPAL_CACHE_MAX_SIZE, ttl_seconds: float = PRINCIPAL_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username: str) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, user = entry
+            if expires_at < time.monotonic():
+                del self._entries[username]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(username)
+            self.hits += 1
+            return user
 
+    def put(self, user: User):
+        with self._lock:
+            self._entries[user.username] = (time.monotonic() + self.ttl_seconds, user)
+            self._entries.move_to_end(user.username)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
 
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    def invalidate(self, username: str):
+        with self._lock:
+            self._entries.pop(username, None)
 
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
 
-def get_user(db: Session, username: str) -> Optional[UserInDB]:
-    user = db.query(UserModel).filter(UserModel.username == username).first()
+    def __len__(self):
+        return len(self._entries)
+
+
+principal_cache = PrincipalCache()
+revocation_store.on_principal_change = principal_cache.invalidate
+
+
+async def get_user_async(db: AsyncSession, username: str) -> Optional[UserInDB]:
+    result = await db.execute(select(UserModel).where(UserModel.username == username))
+    return _to_user_in_db(result.scalar_one_or_none())
+
+
+def _to_user_in_db(user: Optional[UserModel]) -> Optional[UserInDB]:
     if not user:
         return None
     return UserInDB(
@@ -62,29 +129,53 @@ def get_user(db: Session, username: str) -> Optional[UserInDB]:
     )
 
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = get_user(db, username)
-    if not user or not verify_password(password, user.hashed_password):
+async def authenticate_user_async(username: str, password: str) -> Optional[UserInDB]:
+    """
+    Login path: bcrypt runs in the password pool (src/passwords.py).
+    Unknown and disabled users are rejected before any bcrypt work, so they
+    cannot use up the pool; a hash below BCRYPT_ROUNDS is re-hashed and
+    stored after a successful verify. May raise PasswordHasherBusy.
+    """
+    async with AsyncReadSessionLocal() as db:
+        user = await get_user_async(db, username)
+    if not user or user.disabled:
+        return None
+
+    with stage("password_hash"):
+        valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+    if not valid:
         return None
+    if new_hash:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(UserModel).where(UserModel.username == username).values(hashed_password=new_hash)
+            )
+            await db.commit()
     return user
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     payload = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    payload.update({"exp": expire})
+    payload.update({"exp": expire, "jti": uuid4().hex})
     encoded = jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
     return encoded
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    """
+    Runs on the event loop: JWT decode, the revocation Bloom filter and the
+    principal cache are in-memory. A cache miss reads the user through an
+    AsyncSession; a revocation check that needs the (sync) store's DB is
+    pushed to the threadpool. Timed as the "auth" stage in /metrics.
+    """
+    with stage("auth"):
+        user = await _authenticate(token)
+    note_principal(user.role)
+    return user
 
-    if token in TOKEN_BLACKLIST:
-        raise HTTPException(status_code=401, detail="Logged out token")
 
+async def _authenticate(token: str) -> User:
     credentials_error = HTTPException(
         status_code=401,
         detail="Invalid authentication",
@@ -100,25 +191,57 @@ async def get_current_user(
     except JWTError:
         raise credentials_error
 
-    user = get_user(db, username)
+    jti = _token_id(token, payload)
+    revoked = revocation_store.is_revoked_cached(jti)
+    if revoked is None:
+        revoked = await run_in_threadpool(revocation_store.is_revoked, jti)
+    if revoked:
+        raise HTTPException(status_code=401, detail="Logged out token")
+
+    cached = principal_cache.get(username)
+    if cached is not None:
+        return cached
+
+    async with AsyncReadSessionLocal() as db:
+        user = await get_user_async(db, username)
     if not user or user.disabled:
         raise credentials_error
 
-    return User(
+    principal = User(
         username=user.username,
         full_name=user.full_name,
         role=user.role,
         disabled=user.disabled,
     )
+    principal_cache.put(principal)
+    return principal
 
 
 def require_role(role: str):
-    def wrapper(user: User = Depends(get_current_user)):
+    async def wrapper(user: User = Depends(get_current_user)):
         if user.role != role:
             raise HTTPException(status_code=403, detail="Access denied")
         return user
     return wrapper
 
 
+def _token_id(token: str, payload: dict) -> str:
+    # token lama (sebelum ada jti) di-key dengan hash token-nya
+    return payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+
+
 def logout_token(token: str):
-    TOKEN_BLACKLIST.add(token)
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return  # token invalid/expired sudah tidak bisa dipakai
+    expires_at = datetime.utcfromtimestamp(payload["exp"])
+    revocation_store.revoke(_token_id(token, payload), expires_at)
+
+
+def invalidate_principal(username: str):
+    """
+    Call after a user's role/disabled flag changes (blocking: writes the
+    broadcast row with the sql backend, so call it from a threadpool route).
+    """
+    revocation_store.publish_principal_change(username, principal_cache.ttl_seconds)
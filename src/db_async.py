@@ -0,0 +1,416 @@
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import os
+
+from sqlalchemy import insert, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.db import (
+    DATABASE_URL,
+    DATABASE_READ_URL,
+    DB_PROFILE,
+    DB_ROW_LOCK,
+    InventoryEventModel,
+    InventoryItemModel,
+    InventorySummaryModel,
+    StockKey,
+    StockMoveModel,
+    _apply_persisted_state,
+    _attach_pragmas,
+    _conflict,
+    _delete_expired_reservations_stmt,
+    _engine_options,
+    _expired_event_params,
+    _expired_summary_changes,
+    _filter_items,
+    _import_adjust_moves,
+    _import_event_params,
+    _import_rejections,
+    _import_summary_changes,
+    _item_child_writes,
+    _item_event_params,
+    _item_update_stmt,
+    _models_to_domain,
+    _new_item_model,
+    _new_item_row,
+    _outbox_lock_stmt,
+    _reconcile_statements,
+    _reconciled_params,
+    _release_params,
+    _release_reserved_stmt,
+    _reservation_models,
+    _reservations_stmt,
+    _select_item,
+    _select_item_by,
+    _select_events,
+    _select_item_for_update,
+    _select_item_summary_states,
+    _select_item_rows,
+    _select_items_by_order,
+    _select_item_states,
+    _select_items_page,
+    _select_locations,
+    _select_moves,
+    _select_oldest_expired,
+    _select_reservation_rows,
+    _select_stats,
+    _select_summary,
+    _select_summary_actual,
+    _select_top_reserved,
+    _stats_row_to_dict,
+    _sum_released,
+    _summary_change,
+    _summary_drift,
+    _summary_params,
+    _summary_rows_to_dict,
+    _summary_upsert_stmt,
+    _upsert_items_stmt,
+    _upsert_params,
+)
+from src.domain.inventory import DEFAULT_LOCATION, InventoryItem
+
+# ==========================
+# Async Engine (request path)
+# ==========================
+# Driver async untuk URL yang sama dengan engine sync:
+#   sqlite://...      -> sqlite+aiosqlite://...
+#   postgresql://...  -> postgresql+asyncpg://...
+# ASYNC_DATABASE_URL bisa di-set kalau perlu URL/driver lain.
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def to_async_url(url: str) -> str:
+    db_url = make_url(url)
+    backend = db_url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for backend: {backend}")
+    return db_url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+
+
+def create_async_db_engine(url: str = ASYNC_DATABASE_URL, profile: str = DB_PROFILE, read_only: bool = False):
+    """
+    Versi async dari create_db_engine: pool sizing & PRAGMA profile sama,
+    PRAGMA dipasang di sync_engine (event "connect" tetap jalan lewat adapter).
+    """
+    db_url = make_url(url)
+    kwargs, pragmas = _engine_options(db_url, profile, read_only)
+    if read_only and db_url.get_backend_name() == "postgresql":
+        kwargs["connect_args"] = {"server_settings": {"default_transaction_read_only": "on"}}
+    if "pool_size" in kwargs and db_url.get_backend_name() == "sqlite":
+        # default aiosqlite (file) = NullPool -> koneksi + thread baru per request
+        kwargs["poolclass"] = AsyncAdaptedQueuePool
+    db_engine = create_async_engine(db_url, **kwargs)
+    _attach_pragmas(db_engine.sync_engine, pragmas)
+    return db_engine
+
+
+async_engine = create_async_db_engine()
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# reader terpisah, aturan sama dengan read_engine di src/db.py
+if DATABASE_READ_URL:
+    async_read_engine = create_async_db_engine(to_async_url(DATABASE_READ_URL), read_only=True)
+elif async_engine.dialect.name == "sqlite" and DB_PROFILE != "default":
+    async_read_engine = create_async_db_engine(read_only=True)
+else:
+    async_read_engine = async_engine
+AsyncReadSessionLocal = async_sessionmaker(bind=async_read_engine, autoflush=False, expire_on_commit=False)
+
+
+async def dispose_async_engines():
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+
+
+# ==========================
+# REPOSITORY DB (async)
+# ==========================
+
+class AsyncInventoryRepositoryDB:
+    """
+    Kontrak sama dengan InventoryRepositoryDB, tapi lewat AsyncSession
+    sehingga I/O DB tidak memakai slot threadpool. Statement dibangun
+    dengan helper yang sama di src/db.py.
+    """
+
+    def __init__(self, session_factory=None, read_session_factory=None):
+        if session_factory is None:
+            session_factory, read_session_factory = AsyncSessionLocal, read_session_factory or AsyncReadSessionLocal
+        self.session_factory = session_factory
+        self.read_session_factory = read_session_factory or session_factory
+
+        bind = session_factory.kw.get("bind")
+        dialect = bind.dialect.name if bind is not None else "sqlite"
+        self.row_lock = DB_ROW_LOCK if dialect != "sqlite" else "none"
+
+    async def list_all(self) -> List[InventoryItem]:
+        async with self.read_session_factory() as db:
+            item_models = list((await db.execute(select(InventoryItemModel))).scalars())
+            return await self._to_domain(db, item_models)
+
+    async def list_page(
+        self,
+        after_sku: Optional[str] = None,
+        limit: int = 100,
+        sku_prefix: Optional[str] = None,
+        low_stock_only: bool = False,
+        include_reservations: bool = True,
+        location: str = DEFAULT_LOCATION,
+    ) -> List[InventoryItem]:
+        stmt = _select_items_page(after_sku, limit, sku_prefix, low_stock_only, location)
+        async with self.read_session_factory() as db:
+            item_models = list((await db.execute(stmt)).scalars())
+            return await self._to_domain(db, item_models, include_reservations)
+
+    async def iter_items(
+        self,
+        after_sku: Optional[str] = None,
+        sku_prefix: Optional[str] = None,
+        low_stock_only: bool = False,
+        include_reservations: bool = False,
+        chunk_size: int = 1000,
+        location: str = DEFAULT_LOCATION,
+    ) -> AsyncIterator[InventoryItem]:
+        """Stream semua item satu lokasi (urut sku) per chunk lewat AsyncSession.stream."""
+        async with self.read_session_factory() as db:
+            stmt = _filter_items(select(InventoryItemModel), after_sku, sku_prefix, low_stock_only, location)
+            stmt = stmt.order_by(InventoryItemModel.sku).execution_options(yield_per=chunk_size)
+            result = await db.stream(stmt)
+            async for partition in result.scalars().partitions():
+                for item in await self._to_domain(db, partition, include_reservations):
+                    yield item
+
+    async def list_page_rows(
+        self,
+        after_sku: Optional[str] = None,
+        limit: int = 100,
+        sku_prefix: Optional[str] = None,
+        low_stock_only: bool = False,
+        include_reservations: bool = True,
+        location: str = DEFAULT_LOCATION,
+    ) -> Tuple[list, list]:
+        async with self.read_session_factory() as db:
+            rows = (await db.execute(_select_item_rows(after_sku, limit, sku_prefix, low_stock_only, location))).all()
+            res_rows = []
+            if include_reservations and rows:
+                res_rows = (await db.execute(_select_reservation_rows([r.sku for r in rows], location))).all()
+        return rows, res_rows
+
+    async def iter_item_rows(
+        self,
+        after_sku: Optional[str] = None,
+        sku_prefix: Optional[str] = None,
+        low_stock_only: bool = False,
+        include_reservations: bool = False,
+        chunk_size: int = 1000,
+        location: str = DEFAULT_LOCATION,
+    ) -> AsyncIterator[Tuple[list, list]]:
+        async with self.read_session_factory() as db:
+            stmt = _select_item_rows(after_sku, None, sku_prefix, low_stock_only, location)
+            result = await db.stream(stmt.execution_options(yield_per=chunk_size))
+            async for rows in result.partitions():
+                res_rows = []
+                if include_reservations:
+                    res_rows = (await db.execute(_select_reservation_rows([r.sku for r in rows], location))).all()
+                yield rows, res_rows
+
+    async def get_by_sku(self, sku: str, location: str = DEFAULT_LOCATION) -> Optional[InventoryItem]:
+        return await self._get_one(_select_item(sku, location))
+
+    async def get_by_id(self, item_id: str) -> Optional[InventoryItem]:
+        return await self._get_one(_select_item_by(InventoryItemModel.id, item_id))
+
+    async def get_many_by_sku(self, skus: List[str], location: str = DEFAULT_LOCATION) -> Dict[str, InventoryItem]:
+        skus = list(set(skus))
+        if not skus:
+            return {}
+        m = InventoryItemModel
+        async with self.read_session_factory() as db:
+            stmt = select(m).where(m.sku.in_(skus), m.location == location)
+            item_models = list((await db.execute(stmt)).scalars())
+            return {item.sku.value: item for item in await self._to_domain(db, item_models)}
+
+    async def get_many_by_order(self, order_id: str) -> Dict[StockKey, InventoryItem]:
+        async with self.read_session_factory() as db:
+            item_models = list((await db.execute(_select_items_by_order(order_id))).scalars())
+            return {(item.sku.value, item.location): item for item in await self._to_domain(db, item_models)}
+
+    async def get_stats(self, sku: str, location: str = DEFAULT_LOCATION) -> Optional[dict]:
+        async with self.read_session_factory() as db:
+            row = (await db.execute(_select_stats([sku], location))).first()
+        return _stats_row_to_dict(row) if row is not None else None
+
+    async def get_stats_many(self, skus: List[str], location: str = DEFAULT_LOCATION) -> Dict[str, dict]:
+        skus = list(set(skus))
+        if not skus:
+            return {}
+        async with self.read_session_factory() as db:
+            rows = (await db.execute(_select_stats(skus, location))).all()
+        return {row.sku: _stats_row_to_dict(row) for row in rows}
+
+    async def list_locations(self, sku: str, min_available: int = 0, limit: int = 100) -> List[dict]:
+        async with self.read_session_factory() as db:
+            rows = (await db.execute(_select_locations(sku, min_available, limit))).all()
+        return [_stats_row_to_dict(row) for row in rows]
+
+    async def _get_one(self, stmt) -> Optional[InventoryItem]:
+        async with self.read_session_factory() as db:
+            m = (await db.execute(stmt)).scalar_one_or_none()
+            if not m:
+                return None
+            return (await self._to_domain(db, [m]))[0]
+
+    @staticmethod
+    async def _to_domain(db: AsyncSession, item_models, include_reservations: bool = True) -> List[InventoryItem]:
+        if not item_models:
+            return []
+        res_models = []
+        if include_reservations:
+            res_models = (await db.execute(_reservations_stmt(item_models))).scalars()
+        return _models_to_domain(item_models, res_models)
+
+    async def save(self, item: InventoryItem) -> InventoryItem:
+        return (await self.save_many([item]))[0]
+
+    async def save_many(self, items: List[InventoryItem]) -> List[InventoryItem]:
+        """Satu transaksi untuk semua item; satu conflict -> rollback semuanya."""
+        async with self.session_factory() as db:
+            written = [await self._write_item(db, item) for item in items]
+            await self._write_summary(db, [change for _, change in written])
+            states = [state for state, _ in written]
+            await self._write_events(
+                db, [p for item, state in zip(items, states) for p in _item_event_params(item, state)]
+            )
+            await db.commit()
+
+        for item, state in zip(items, states):
+            _apply_persisted_state(item, state)
+        return items
+
+    @asynccontextmanager
+    async def lock_for_update(self, sku: str, location: str = DEFAULT_LOCATION) -> AsyncIterator[InventoryItem]:
+        """SELECT ... FOR UPDATE + save di transaksi yang sama."""
+        async with self.session_factory() as db:
+            model = (await db.execute(_select_item_for_update(sku, location))).scalar_one_or_none()
+            if model is None:
+                raise ValueError("Item not found")
+
+            item = (await self._to_domain(db, [model]))[0]
+            yield item
+
+            state, change = await self._write_item(db, item)
+            await self._write_summary(db, [change])
+            await self._write_events(db, _item_event_params(item, state))
+            await db.commit()
+
+        _apply_persisted_state(item, state)
+
+    @staticmethod
+    async def _write_item(db: AsyncSession, item: InventoryItem) -> Tuple[Tuple[int, int, int], tuple]:
+        if item.version == 0:
+            db.add(_new_item_model(item))
+            added, removed_ids = list(item.reservations), []
+            row = _new_item_row(item)
+        else:
+            added, removed_ids = item.pending_reservation_changes()
+            row = (await db.execute(_item_update_stmt(item))).first()
+            if row is None:
+                await db.rollback()
+                raise _conflict(item)
+        new_state = tuple(row[:3])
+
+        for stmt, params in _item_child_writes(item, removed_ids):
+            await db.execute(stmt, params)
+        db.add_all(_reservation_models(item, added))
+        return new_state, _summary_change(item, row)
+
+    @staticmethod
+    async def _write_summary(db: AsyncSession, changes: List[tuple]):
+        params = _summary_params(changes)
+        if params:
+            await db.execute(_summary_upsert_stmt(db.get_bind().dialect.name), params)
+
+    @staticmethod
+    async def _write_events(db: AsyncSession, params: List[dict]):
+        if not params:
+            return
+        lock = _outbox_lock_stmt(db.get_bind().dialect.name)
+        if lock is not None:
+            await db.execute(lock)
+        await db.execute(insert(InventoryEventModel), params)
+
+    async def upsert_items(
+        self, records: List[dict], on_conflict: str = "skip", location: str = DEFAULT_LOCATION
+    ) -> Tuple[Dict[str, int], Dict[str, str]]:
+        async with self.session_factory() as db:
+            before = (await db.execute(_select_item_summary_states([r["sku"] for r in records], location))).all()
+            stmt = _upsert_items_stmt(db.get_bind().dialect.name, on_conflict)
+            rows = (await db.execute(stmt, _upsert_params(records, location))).all()
+            if rows:
+                moves = _import_adjust_moves(records, before, rows, location)
+                if moves:
+                    await db.execute(insert(StockMoveModel), [move for _, move in moves.values()])
+                await self._write_summary(db, _import_summary_changes(records, before, rows, location))
+                await self._write_events(db, _import_event_params(records, rows, location, moves))
+            await db.commit()
+        rejected = _import_rejections(records, before, rows) if on_conflict == "update" else {}
+        return {sku: version for sku, version, _, _ in rows}, rejected
+
+    async def oldest_expired_reservation(self, now: datetime) -> Optional[datetime]:
+        async with self.read_session_factory() as db:
+            return (await db.execute(_select_oldest_expired(now))).scalar()
+
+    async def release_expired_reservations(self, now: datetime, limit: int = 500) -> Tuple[int, Dict[StockKey, int]]:
+        async with self.session_factory() as db:
+            rows = (await db.execute(_delete_expired_reservations_stmt(now, limit))).all()
+            count, released = _sum_released(rows)
+            if released:
+                await db.execute(_release_reserved_stmt(), _release_params(released))
+                states = (await db.execute(_select_item_states(list(released)))).all()
+                await self._write_summary(db, _expired_summary_changes(released, states))
+                await self._write_events(db, _expired_event_params(rows, states))
+            await db.commit()
+        return count, released
+
+    async def get_summary(self, top: int = 10) -> dict:
+        async with self.read_session_factory() as db:
+            summary_rows = (await db.execute(_select_summary())).all()
+            top_rows = (await db.execute(_select_top_reserved(top))).all() if top else []
+        return _summary_rows_to_dict(summary_rows, top_rows)
+
+    async def reconcile_summary(self) -> Dict[str, Dict[str, int]]:
+        async with self.session_factory() as db:
+            lock, delete_stmt = _reconcile_statements(db.get_bind().dialect.name)
+            if lock is not None:
+                await db.execute(lock)
+            stored = (await db.execute(delete_stmt)).all()
+            actual = (await db.execute(_select_summary_actual())).all()
+            if actual:
+                await db.execute(insert(InventorySummaryModel), _reconciled_params(actual))
+            await db.commit()
+        return _summary_drift(stored, actual)
+
+    async def list_moves(
+        self,
+        sku: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 100,
+        location: str = DEFAULT_LOCATION,
+    ) -> List[StockMoveModel]:
+        async with self.read_session_factory() as db:
+            return list((await db.execute(_select_moves(sku, since, until, after, limit, location))).scalars())
+
+    async def list_events(
+        self, after: int = 0, limit: int = 100, sku: Optional[str] = None, location: Optional[str] = None
+    ) -> list:
+        async with self.read_session_factory() as db:
+            return (await db.execute(_select_events(after, limit, sku, location))).all()
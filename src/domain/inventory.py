@@ -1,12 +1,26 @@
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from uuid import uuid4
 
 
+# ---------- Errors ----------
+
+class ConcurrencyConflict(Exception):
+    """Raised when an aggregate was modified concurrently since it was loaded."""
+
+
+# lokasi (gudang / site) untuk item tanpa lokasi eksplisit; dipakai juga untuk
+# baris DB lama sebelum kolom location ada
+DEFAULT_LOCATION = "MAIN"
+
+
 # ---------- Value Objects ----------
+# Semua value object & entity memakai __slots__: tanpa __dict__ per instance,
+# jadi jauh lebih hemat memory saat me-load banyak reservation.
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SKU:
     value: str
 
@@ -17,7 +31,7 @@ class SKU:
         object.__setattr__(self, "value", cleaned)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Quantity:
     amount: int
     uom: str = "pcs"
@@ -26,6 +40,15 @@ class Quantity:
         if self.amount < 0:
             raise ValueError("Quantity cannot be negative")
 
+    @staticmethod
+    def of(amount: int, uom: str = "pcs") -> "Quantity":
+        """
+        Shared (interned) instance for common (amount, uom) pairs.
+        Meant for read-only values such as rows mapped from the DB;
+        domain operations keep creating fresh instances.
+        """
+        return _interned_quantity(amount, uom)
+
     def add(self, other: "Quantity") -> "Quantity":
         if self.uom != other.uom:
             raise ValueError("UOM mismatch")
@@ -39,13 +62,18 @@ class Quantity:
         return Quantity(self.amount - other.amount, self.uom)
 
 
-@dataclass(frozen=True)
+@lru_cache(maxsize=4096)
+def _interned_quantity(amount: int, uom: str) -> Quantity:
+    return Quantity(amount, uom)
+
+
+@dataclass(frozen=True, slots=True)
 class Batch:
     code: Optional[str] = None
     exp_date: Optional[datetime] = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Threshold:
     min_qty: int
 
@@ -55,19 +83,79 @@ class Threshold:
 
 # ---------- Entities ----------
 
-@dataclass
+@dataclass(slots=True)
 class Reservation:
     id: str
     order_id: str
     reserved_qty: Quantity
     created_at: datetime = field(default_factory=datetime.utcnow)
+    expires_at: Optional[datetime] = None  # None = held until released
 
     @staticmethod
-    def create(order_id: str, qty: Quantity) -> "Reservation":
-        return Reservation(id=str(uuid4()), order_id=order_id, reserved_qty=qty)
+    def create(order_id: str, qty: Quantity, ttl_seconds: Optional[int] = None) -> "Reservation":
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl_seconds) if ttl_seconds else None
+        return Reservation(id=str(uuid4()), order_id=order_id, reserved_qty=qty, created_at=now, expires_at=expires_at)
+
+
+class ReservationBook:
+    """
+    Open reservations of one item, indexed by id and by order_id.
+    Iterates in insertion order; lookup and removal are O(1) per reservation.
+    """
+
+    __slots__ = ("_by_id", "_by_order")
+
+    def __init__(self, reservations: Iterable[Reservation] = ()):
+        self._by_id: Dict[str, Reservation] = {}
+        self._by_order: Dict[str, Dict[str, Reservation]] = {}
+        for r in reservations:
+            self.add(r)
+
+    def add(self, reservation: Reservation):
+        self._by_id[reservation.id] = reservation
+        self._by_order.setdefault(reservation.order_id, {})[reservation.id] = reservation
+
+    def get(self, reservation_id: str) -> Optional[Reservation]:
+        return self._by_id.get(reservation_id)
+
+    def pop(self, reservation_id: str) -> Optional[Reservation]:
+        reservation = self._by_id.pop(reservation_id, None)
+        if reservation is not None:
+            same_order = self._by_order[reservation.order_id]
+            del same_order[reservation_id]
+            if not same_order:
+                del self._by_order[reservation.order_id]
+        return reservation
 
+    def pop_order(self, order_id: str) -> List[Reservation]:
+        released = list(self._by_order.pop(order_id, {}).values())
+        for r in released:
+            del self._by_id[r.id]
+        return released
 
-@dataclass
+    def for_order(self, order_id: str) -> List[Reservation]:
+        return list(self._by_order.get(order_id, {}).values())
+
+    def __iter__(self) -> Iterator[Reservation]:
+        return iter(self._by_id.values())
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, reservation_id: str) -> bool:
+        return reservation_id in self._by_id
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ReservationBook):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ReservationBook({list(self)!r})"
+
+
+@dataclass(slots=True)
 class StockMove:
     id: str
     movement_type: str  # IN, OUT, ADJUST
@@ -85,9 +173,26 @@ class StockMove:
         )
 
 
+@dataclass(slots=True)
+class InventoryEvent:
+    """
+    Something that happened to one item. Collected on the aggregate and
+    written to the inventory_events outbox in the same transaction as the
+    item itself; `data` must stay JSON-serialisable.
+    """
+    id: str
+    event_type: str  # item.created, stock.increased, stock.reserved, ...
+    data: dict
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+    @staticmethod
+    def create(event_type: str, **data) -> "InventoryEvent":
+        return InventoryEvent(id=str(uuid4()), event_type=event_type, data=data)
+
+
 # ---------- Aggregate Root ----------
 
-@dataclass
+@dataclass(slots=True)
 class InventoryItem:
     id: str
     sku: SKU
@@ -95,17 +200,57 @@ class InventoryItem:
     reserved: Quantity
     threshold: Threshold
     batch: Optional[Batch] = None
-    reservations: List[Reservation] = field(default_factory=list)
+    reservations: ReservationBook = field(default_factory=ReservationBook)
     moves: List[StockMove] = field(default_factory=list)
+    version: int = 0  # 0 = belum pernah dipersist (optimistic concurrency)
+    # satu aggregate = stok satu SKU di satu lokasi; (sku, location) unik
+    location: str = DEFAULT_LOCATION
+
+    # change tracking: reservations added/removed since load (dipakai repository
+    # supaya save hanya menulis diff, bukan rewrite semua reservation)
+    _added_reservations: Dict[str, Reservation] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _removed_reservation_ids: Set[str] = field(
+        default_factory=set, init=False, repr=False, compare=False
+    )
+    # jumlah moves yang sudah ditulis ke ledger stock_moves
+    _flushed_moves: int = field(default=0, init=False, repr=False, compare=False)
+    # event yang belum ditulis ke outbox inventory_events
+    _pending_events: List[InventoryEvent] = field(default_factory=list, init=False, repr=False, compare=False)
+    # (on_hand, reserved, min_qty) terakhir yang diketahui ada di DB
+    _persisted_state: Optional[Tuple[int, int, int]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # Quantity available terakhir; dibuat ulang hanya kalau nilainya berubah
+    _available: Optional[Quantity] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if not isinstance(self.reservations, ReservationBook):
+            self.reservations = ReservationBook(self.reservations)
+        location = self.location.strip()
+        if not location:
+            raise ValueError("Location cannot be empty")
+        self.location = location
+        if self.version == 0:
+            self._record("item.created", uom=self.on_hand.uom, min_qty=self.threshold.min_qty)
 
     # invariants:
     # - on_hand.amount >= 0
     # - reserved.amount >= 0
     # - reserved.amount <= on_hand.amount
 
+    @property
+    def available_amount(self) -> int:
+        return self.on_hand.amount - self.reserved.amount
+
     @property
     def available(self) -> Quantity:
-        return Quantity(self.on_hand.amount - self.reserved.amount, self.on_hand.uom)
+        amount = self.on_hand.amount - self.reserved.amount
+        cached = self._available
+        if cached is None or cached.amount != amount or cached.uom != self.on_hand.uom:
+            cached = self._available = Quantity(amount, self.on_hand.uom)
+        return cached
 
     def _ensure_invariants(self):
         if self.on_hand.amount < 0:
@@ -115,35 +260,75 @@ class InventoryItem:
         if self.reserved.amount > self.on_hand.amount:
             raise ValueError("Reserved cannot exceed on hand")
 
+    def _record(self, event_type: str, **data):
+        self._pending_events.append(InventoryEvent.create(event_type, **data))
+
+    def _move(self, movement_type: str, moved: Quantity, reason: Optional[str], event_type: str, **data):
+        move = StockMove.create(movement_type, moved, reason)
+        self.moves.append(move)
+        self._record(event_type, move_id=move.id, reason=reason, **data)
+
     def increase(self, qty: Quantity, reason: str = "INBOUND"):
         self.on_hand = self.on_hand.add(qty)
-        self.moves.append(StockMove.create("IN", qty, reason))
+        self._move("IN", qty, reason, "stock.increased", qty=qty.amount)
         self._ensure_invariants()
 
     def decrease(self, qty: Quantity, reason: str = "CONSUME"):
-        if qty.amount > self.available.amount:
+        if qty.amount > self.available_amount:
             raise ValueError("Not enough available stock to decrease")
         self.on_hand = self.on_hand.sub(qty)
-        self.moves.append(StockMove.create("OUT", qty, reason))
+        self._move("OUT", qty, reason, "stock.decreased", qty=qty.amount)
         self._ensure_invariants()
 
-    def reserve(self, order_id: str, qty: Quantity) -> Reservation:
-        if qty.amount > self.available.amount:
+    def set_threshold(self, min_qty: int):
+        self.threshold = Threshold(min_qty)
+        self._record("threshold.changed", min_qty=min_qty)
+
+    def reserve(self, order_id: str, qty: Quantity, ttl_seconds: Optional[int] = None) -> Reservation:
+        if qty.amount > self.available_amount:
             raise ValueError("Not enough available stock to reserve")
         self.reserved = self.reserved.add(qty)
-        reservation = Reservation.create(order_id, qty)
-        self.reservations.append(reservation)
+        reservation = Reservation.create(order_id, qty, ttl_seconds)
+        self.reservations.add(reservation)
+        self._added_reservations[reservation.id] = reservation
         self._ensure_invariants()
+        self._record(
+            "stock.reserved",
+            reservation_id=reservation.id,
+            order_id=order_id,
+            qty=qty.amount,
+            expires_at=reservation.expires_at.isoformat() if reservation.expires_at else None,
+        )
         return reservation
 
     def release(self, reservation_id: str):
-        res = next((r for r in self.reservations if r.id == reservation_id), None)
+        res = self.reservations.pop(reservation_id)
         if not res:
             raise ValueError("Reservation not found")
-        self.reservations.remove(res)
+        self._track_released(res)
         self.reserved = self.reserved.sub(res.reserved_qty)
         self._ensure_invariants()
 
+    def release_by_order(self, order_id: str) -> List[Reservation]:
+        """Release every reservation of `order_id` (e.g. order cancelled)."""
+        released = self.reservations.pop_order(order_id)
+        if not released:
+            raise ValueError("No reservations for order")
+        for res in released:
+            self._track_released(res)
+        total = sum(r.reserved_qty.amount for r in released)
+        self.reserved = self.reserved.sub(Quantity(total, self.reserved.uom))
+        self._ensure_invariants()
+        return released
+
+    def _track_released(self, res: Reservation):
+        # reservation yang belum pernah dipersist cukup dibuang dari diff
+        if self._added_reservations.pop(res.id, None) is None:
+            self._removed_reservation_ids.add(res.id)
+        self._record(
+            "reservation.released", reservation_id=res.id, order_id=res.order_id, qty=res.reserved_qty.amount
+        )
+
     def adjust(self, delta: int, reason: str = "ADJUST"):
         """
         Adjust stock using a positive or negative integer delta.
@@ -166,9 +351,54 @@ class InventoryItem:
             self.on_hand = self.on_hand.sub(Quantity(abs_delta, self.on_hand.uom))
             moved_qty = Quantity(abs_delta, self.on_hand.uom)
         # Record stock movement
-        self.moves.append(StockMove.create("ADJUST", moved_qty, reason))
+        self._move("ADJUST", moved_qty, reason, "stock.adjusted", delta=delta)
         # Re-validate invariants
         self._ensure_invariants()
 
     def is_low_stock(self) -> bool:
-        return self.threshold.is_low(self.available)
\ No newline at end of file
+        return self.threshold.is_low(self.available)
+
+    def pending_reservation_changes(self) -> Tuple[List[Reservation], List[str]]:
+        """
+        Return (added reservations, removed reservation ids) since the
+        aggregate was loaded or last persisted.
+        """
+        return list(self._added_reservations.values()), list(self._removed_reservation_ids)
+
+    def pending_moves(self) -> List[StockMove]:
+        """Stock moves recorded since the last persist (not yet in the ledger)."""
+        return self.moves[self._flushed_moves:]
+
+    def pending_events(self) -> List[InventoryEvent]:
+        """Domain events recorded since the last persist (not yet in the outbox)."""
+        return list(self._pending_events)
+
+    def persisted_state(self) -> Optional[Tuple[int, int, int]]:
+        """(on_hand, reserved, min_qty) as last loaded / written; None if never persisted."""
+        return self._persisted_state
+
+    def pending_reserve_delta(self) -> Optional[int]:
+        """
+        If the only change since load is new reservations, return the total
+        reserved amount added (so the repository can apply it as a guarded
+        increment). Otherwise return None.
+        """
+        if (
+            self._persisted_state is None
+            or self._removed_reservation_ids
+            or not self._added_reservations
+            or self.pending_moves()
+        ):
+            return None
+        on_hand, reserved, min_qty = self._persisted_state
+        if on_hand != self.on_hand.amount or min_qty != self.threshold.min_qty:
+            return None
+        return self.reserved.amount - reserved
+
+    def mark_persisted(self):
+        """Clear change tracking after the repository has written the diff."""
+        self._added_reservations.clear()
+        self._removed_reservation_ids.clear()
+        self._flushed_moves = len(self.moves)
+        self._pending_events.clear()
+        self._persisted_state = (self.on_hand.amount, self.reserved.amount, self.threshold.min_qty)
@@ -1,31 +1,62 @@
-from fastapi import FastAPI, Depends, HTTPException
-from fastapi.responses import RedirectResponse
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import RedirectResponse, JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from typing import List
-from sqlalchemy import text
+from typing import List, Optional
+from sqlalchemy import select, text
+from sqlalchemy.exc import IntegrityError
 from src.db import get_db
+import asyncio
 import datetime
 import logging
 import time
 
 from src.auth import (
     Token,
-    authenticate_user,
+    authenticate_user_async,
     create_access_token,
     require_role,
     get_current_user,
     logout_token,
-    hash_password,
     oauth2_scheme,
+    invalidate_principal,
+    principal_cache,
 )
 from src.db import (
     init_db,
     get_db,
+    engine,
+    read_engine,
     UserModel,
-    InventoryRepositoryDB,
 )
-from src.services.inventory_service import InventoryService
+from src.db_async import (
+    AsyncInventoryRepositoryDB,
+    AsyncSessionLocal,
+    async_engine,
+    async_read_engine,
+    dispose_async_engines,
+)
+from src.metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware, instrument_engine, stage
+from src import profiling
+from src.passwords import PasswordHasherBusy, password_hasher
+from src.profiling import ProfilingMiddleware, slow_requests
+from src.services.inventory_service import EVENT_STREAM_HEARTBEAT_SECONDS, AsyncInventoryService
+from src.services.item_import import aiter_lines
+from src.services.reservation_sweeper import ReservationSweeper
+from src.services.summary_reconciler import SummaryReconciler
+from src.serialization import (
+    CSV_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    SSE_MEDIA_TYPE,
+    events_json,
+    events_sse,
+    items_csv,
+    items_json,
+    items_ndjson,
+    to_item_dto,
+)
+from src.domain.inventory import DEFAULT_LOCATION, ConcurrencyConflict
 from src.schemas.inventory import (
     CreateItemRequest,
     IncreaseStockRequest,
@@ -33,11 +64,24 @@ from src.schemas.inventory import (
     AdjustStockRequest,
     SetThresholdRequest,
     ReserveStockRequest,
+    BatchReserveRequest,
+    BatchReserveResponse,
     ReleaseReservationRequest,
+    ReleaseOrderResponse,
     InventoryItemDto,
     InventoryStats,
+    InventorySummary,
+    AvailabilityCacheStats,
+    ImportItemsResponse,
+    BatchAvailabilityRequest,
+    BatchAvailabilityResponse,
+    EventDto,
     ReservationDto,
+    ReservationSweeperStats,
+    SummaryReconcilerStats,
+    StockMoveDto,
 )
+from src.schemas.debug import SlowRequestsResponse
 from pydantic import BaseModel
 
 
@@ -45,13 +89,87 @@ from pydantic import BaseModel
 # STARTUP
 # =============================================================
 app = FastAPI(title="Inventory Control API with JWT Auth")
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)  # terakhir ditambah = paling luar
 init_db()
 
 START_TIME = time.time()
 
-repo = InventoryRepositoryDB()
-service = InventoryService(repo)
-service = InventoryService(repo)
+# request path inventory: async end-to-end (AsyncSession), tidak makan threadpool
+repo = AsyncInventoryRepositoryDB()
+service = AsyncInventoryService(repo)
+# lepas reservation yang lewat expires_at (TTL) di background
+sweeper = ReservationSweeper(repo, service.availability_cache)
+# rekonsiliasi penuh inventory_summary (counter dijaga inkremental per write)
+reconciler = SummaryReconciler(repo)
+# PeriodicWorker: start/stop bersama aplikasi, metric runs/errors per worker
+background_workers = (sweeper, reconciler)
+
+
+def get_inventory_service() -> AsyncInventoryService:
+    return service
+
+
+# =============================================================
+# METRICS
+# =============================================================
+for _engine in (engine, read_engine, async_engine.sync_engine, async_read_engine.sync_engine):
+    instrument_engine(_engine)
+    profiling.instrument_engine(_engine)
+
+
+def _runtime_metrics():
+    """Gauge/counter dari state yang sudah ada, dibaca saat scrape /metrics."""
+    availability = service.availability_cache.stats()
+    principal_lookups = principal_cache.hits + principal_cache.misses
+    sweep = sweeper.stats()
+    hasher = password_hasher.stats()
+    summary = reconciler.stats()
+    return [
+        ("wms_process_start_time_seconds", "gauge", "Unix time the worker started.", [({}, START_TIME)]),
+        ("wms_uptime_seconds", "gauge", "Seconds since the worker started.", [({}, time.time() - START_TIME)]),
+        ("wms_cache_hits_total", "counter", "Cache hits.", [
+            ({"cache": "availability"}, availability["hits"]),
+            ({"cache": "principal"}, principal_cache.hits),
+        ]),
+        ("wms_cache_misses_total", "counter", "Cache misses.", [
+            ({"cache": "availability"}, availability["misses"]),
+            ({"cache": "principal"}, principal_cache.misses),
+        ]),
+        ("wms_cache_hit_ratio", "gauge", "Hits / lookups since start.", [
+            ({"cache": "availability"}, availability["hit_ratio"]),
+            ({"cache": "principal"}, principal_cache.hits / principal_lookups if principal_lookups else 0.0),
+        ]),
+        ("wms_cache_entries", "gauge", "Entries currently cached.", [
+            ({"cache": "availability"}, availability["size"]),
+            ({"cache": "principal"}, len(principal_cache)),
+        ]),
+        ("wms_cache_evictions_total", "counter", "LRU evictions.", [({"cache": "availability"}, availability["evictions"])]),
+        ("wms_reservation_sweep_released_total", "counter", "Expired reservations released by the sweeper.",
+         [({}, sweep["released_total"])]),
+        ("wms_reservation_sweep_lag_seconds", "gauge", "Age of the oldest expired reservation at the last sweep.",
+         [({}, sweep["last_lag_seconds"])]),
+        ("wms_password_hash_pending", "gauge", "bcrypt jobs queued or running in the password pool.",
+         [({}, hasher["pending"])]),
+        ("wms_password_hash_completed_total", "counter", "bcrypt jobs that finished successfully.",
+         [({}, hasher["completed"])]),
+        ("wms_password_hash_failed_total", "counter", "bcrypt jobs that raised or were cancelled.",
+         [({}, hasher["failed"])]),
+        ("wms_password_hash_rejected_total", "counter", "bcrypt jobs rejected because the queue was full.",
+         [({}, hasher["rejected"])]),
+        ("wms_summary_reconcile_drift_runs_total", "counter", "Reconciliations that had to correct counter drift.",
+         [({}, summary["drift_runs"])]),
+        ("wms_background_runs_total", "counter", "Completed runs of a background worker.",
+         [({"worker": w.name}, w.runs) for w in background_workers]),
+        ("wms_background_errors_total", "counter", "Failed runs of a background worker.",
+         [({"worker": w.name}, w.errors) for w in background_workers]),
+        ("wms_background_last_duration_seconds", "gauge", "Duration of the last run of a background worker.",
+         [({"worker": w.name}, w.last_duration_seconds) for w in background_workers]),
+    ]
+
+
+REGISTRY.register_collector(_runtime_metrics)
+
 
 @app.on_event("startup")
 async def startup_event():
@@ -63,6 +181,25 @@ async def startup_event():
         "Note: http://0.0.0.0:8000 TIDAK bisa dibuka dari browser\n"
         "=============================================\n"
     )
+    for worker in background_workers:
+        worker.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for worker in background_workers:
+        await worker.stop()
+    password_hasher.shutdown()
+    await dispose_async_engines()
+
+@app.exception_handler(ConcurrencyConflict)
+async def concurrency_conflict_handler(request, exc: ConcurrencyConflict):
+    # retry di service sudah habis -> client boleh coba lagi
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request, exc: PasswordHasherBusy):
+    # antrean bcrypt penuh: tolak cepat daripada menahan request berdetik-detik
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
 
 # =============================================================
 # HELPERS
@@ -82,26 +219,15 @@ class UserDto(BaseModel):
     disabled: bool
 
 
-# Convert domain → DTO
-def to_item_dto(item) -> InventoryItemDto:
-    return InventoryItemDto(
-        id=item.id,
-        sku=item.sku.value,
-        on_hand=item.on_hand.amount,
-        reserved=item.reserved.amount,
-        available=item.available.amount,
-        uom=item.on_hand.uom,
-        min_qty=item.threshold.min_qty,
-        low_stock=item.is_low_stock(),
-        reservations=[
-            ReservationDto(
-                id=r.id,
-                order_id=r.order_id,
-                reserved_qty=r.reserved_qty.amount
-            )
-            for r in item.reservations
-        ],
-    )
+class UpdateUserRequest(BaseModel):
+    role: str | None = None  # admin / client / manager
+    disabled: bool | None = None
+
+
+def _json_page(rows, res_rows, next_cursor) -> Response:
+    """Halaman listing sebagai bytes JSON siap kirim (tanpa validasi response_model)."""
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return Response(items_json(rows, res_rows), media_type=JSON_MEDIA_TYPE, headers=headers)
 
 
 # =============================================================
@@ -112,6 +238,11 @@ def to_item_dto(item) -> InventoryItemDto:
 def root():
     return RedirectResponse(url="/docs")
 
+@app.get("/metrics")
+def metrics():
+    """Format teks Prometheus (per worker)."""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
 @app.get("/health")
 def health_check(db: Session = Depends(get_db)):
     try:
@@ -132,25 +263,30 @@ def health_check(db: Session = Depends(get_db)):
 # =============================================================
 
 @app.post("/auth/register")
-def register(payload: RegisterRequest, db: Session = Depends(get_db)):
+async def register(payload: RegisterRequest):
 
     if payload.role not in {"admin", "manager", "client"}:
         raise HTTPException(status_code=400, detail="Role must be admin/manager/client")
 
-    exists = db.query(UserModel).filter(UserModel.username == payload.username).first()
-    if exists:
-        raise HTTPException(status_code=400, detail="Username already registered")
-
-    user = UserModel(
-        username=payload.username,
-        full_name=payload.full_name,
-        role=payload.role,
-        disabled=False,
-        hashed_password=hash_password(payload.password)
-    )
-
-    db.add(user)
-    db.commit()
+    async with AsyncSessionLocal() as db:
+        exists = await db.scalar(select(UserModel.username).where(UserModel.username == payload.username))
+        if exists:
+            raise HTTPException(status_code=400, detail="Username already registered")
+
+        # bcrypt di password pool (src/passwords.py), bukan di thread request
+        with stage("password_hash"):
+            hashed_password = await password_hasher.hash(payload.password)
+        db.add(UserModel(
+            username=payload.username,
+            full_name=payload.full_name,
+            role=payload.role,
+            disabled=False,
+            hashed_password=hashed_password,
+        ))
+        try:
+            await db.commit()
+        except IntegrityError:  # register bersamaan dengan username sama
+            raise HTTPException(status_code=400, detail="Username already registered")
     return {"message": "User registered successfully."}
 
 
@@ -159,11 +295,8 @@ def register(payload: RegisterRequest, db: Session = Depends(get_db)):
 # =============================================================
 
 @app.post("/auth/login", response_model=Token)
-def login(
-    form: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
-):
-    user = authenticate_user(db, form.username, form.password)
+async def login(form: OAuth2PasswordRequestForm = Depends()):
+    user = await authenticate_user_async(form.username, form.password)
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
 
@@ -202,21 +335,52 @@ def list_users(
     ]
 
 
+@app.patch("/admin/users/{username}", response_model=UserDto)
+def update_user(
+    username: str,
+    payload: UpdateUserRequest,
+    _user=Depends(require_role("admin")),
+    db: Session = Depends(get_db),
+):
+    user = db.query(UserModel).filter(UserModel.username == username).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if payload.role is not None:
+        if payload.role not in {"admin", "manager", "client"}:
+            raise HTTPException(status_code=400, detail="Role must be admin/manager/client")
+        user.role = payload.role
+    if payload.disabled is not None:
+        user.disabled = payload.disabled
+    db.commit()
+
+    # principal cache harus tahu perubahan role / disabled
+    invalidate_principal(username)
+
+    return UserDto(
+        username=user.username,
+        full_name=user.full_name,
+        role=user.role,
+        disabled=user.disabled,
+    )
+
+
 # =============================================================
 # ADMIN ENDPOINTS
 # =============================================================
 
 @app.post("/admin/items", response_model=InventoryItemDto)
-def create_item(
+async def create_item(
     payload: CreateItemRequest,
-    _admin=Depends(require_role("admin"))
+    _admin=Depends(require_role("admin")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
 ):
     try:
-        item = service.create_item(
+        item = await service.create_item(
             sku=payload.sku,
             initial_qty=payload.initial_qty,
             uom=payload.uom,
             min_qty=payload.min_qty,
+            location=payload.location,
         )
         return to_item_dto(item)
     except ValueError as e:
@@ -224,124 +388,348 @@ def create_item(
 
 
 @app.get("/admin/items", response_model=List[InventoryItemDto])
-def list_items(_admin=Depends(require_role("admin"))):
-    return [to_item_dto(i) for i in service.list_items()]
+async def list_items(
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = Query(None, description="Cursor: SKU terakhir dari halaman sebelumnya"),
+    prefix: Optional[str] = Query(None, description="Filter SKU prefix"),
+    low_stock: bool = False,
+    include_reservations: bool = True,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    location: str = Query(DEFAULT_LOCATION, description="Lokasi / gudang"),
+    _admin=Depends(require_role("admin")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
+):
+    """
+    Listing item dengan keyset pagination (cursor = sku).
+    - format=json: satu halaman, cursor berikutnya di header X-Next-Cursor
+    - format=ndjson: stream semua item yang cocok (limit diabaikan), memory konstan
+    Baris DB langsung diserialisasi ke bytes (src/serialization.py);
+    response_model hanya untuk dokumentasi OpenAPI.
+    """
+    if format == "ndjson":
+        chunks = service.iter_item_rows(after, prefix, low_stock, include_reservations, location=location)
+        body = (items_ndjson(rows, res_rows) async for rows, res_rows in chunks)
+        return StreamingResponse(body, media_type=NDJSON_MEDIA_TYPE)
+
+    rows, res_rows, next_cursor = await service.list_item_rows_page(
+        after, limit, prefix, low_stock, include_reservations, location=location
+    )
+    return _json_page(rows, res_rows, next_cursor)
+
+
+@app.post("/admin/items:import", response_model=ImportItemsResponse)
+async def import_items(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    on_conflict: str = Query("error", pattern="^(error|skip|update)$"),
+    location: str = Query(DEFAULT_LOCATION, description="Lokasi / gudang"),
+    _admin=Depends(require_role("admin")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
+):
+    """
+    Bulk import dari body CSV (header wajib ada kolom sku) atau NDJSON.
+    Body dibaca per chunk dan di-upsert per IMPORT_CHUNK_SIZE baris; baris
+    yang gagal dilaporkan per nomor baris tanpa membatalkan chunk lain.
+    - on_conflict=error: SKU yang sudah ada = error baris
+    - skip: SKU yang sudah ada dilewati
+    - update: timpa on_hand/uom/min_qty (ditolak kalau on_hand < reserved)
+    Semua baris masuk ke satu `location` (kolom location di file diabaikan).
+    """
+    try:
+        report = await service.import_items(aiter_lines(request.stream()), format, on_conflict, location=location)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return report.as_dict()
+
+
+@app.get("/admin/items:export")
+async def export_items(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    prefix: Optional[str] = Query(None, description="Filter SKU prefix"),
+    location: str = Query(DEFAULT_LOCATION, description="Lokasi / gudang"),
+    _admin=Depends(require_role("admin")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
+):
+    """
+    Stream semua item (cursor server-side, yield_per) sebagai CSV atau NDJSON.
+    Output CSV bisa di-import kembali apa adanya.
+    """
+    chunks = service.iter_item_rows(None, prefix, location=location)
+    if format == "ndjson":
+        body = (items_ndjson(rows) async for rows, _ in chunks)
+        media_type, filename = NDJSON_MEDIA_TYPE, "items.ndjson"
+    else:
+        body = _csv_export(chunks)
+        media_type, filename = CSV_MEDIA_TYPE, "items.csv"
+    return StreamingResponse(
+        body, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+async def _csv_export(chunks):
+    yield items_csv((), header=True)
+    async for rows, _ in chunks:
+        yield items_csv(rows)
 
 
 @app.get("/admin/items/{sku}", response_model=InventoryItemDto)
-def get_item(sku: str, _admin=Depends(require_role("admin"))):
+async def get_item(
+    sku: str,
+    location: str = Query(DEFAULT_LOCATION, description="Lokasi / gudang"),
+    _admin=Depends(require_role("admin")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
+):
     try:
-        return to_item_dto(service.get_item(sku))
+        return to_item_dto(await service.get_item(sku, location))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
+@app.get("/admin/items/{sku}/moves", response_model=List[StockMoveDto])
+async def list_moves(
+    sku: str,
+    response: Response,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    after: Optional[str] = Query(None, description="Cursor dari header X-Next-Cursor"),
+    limit: int = Query(100, ge=1, le=1000),
+    location: str = Query(DEFAULT_LOCATION, description="Lokasi / gudang"),
+    _admin=Depends(require_role("admin")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
+):
+    try:
+        moves, next_cursor = await service.list_moves(sku, since, until, after, limit, location=location)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [
+        StockMoveDto(
+            id=m.id,
+            sku=m.sku,
+            location=m.location,
+            movement_type=m.movement_type,
+            qty=m.qty,
+            uom=m.uom,
+            reason=m.reason,
+            created_at=m.created_at,
+        )
+        for m in moves
+    ]
+
+
 @app.post("/admin/items/{sku}/threshold", response_model=InventoryItemDto)
-def set_threshold(
+async def set_threshold(
     sku: str,
     payload: SetThresholdRequest,
+    location: str = Query(DEFAULT_LOCATION, description="Lokasi / gudang"),
     _admin=Depends(require_role("admin")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
 ):
     try:
-        item = service.set_threshold(sku, payload.min_qty)
+        item = await service.set_threshold(sku, payload.min_qty, location=location)
         return to_item_dto(item)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
 @app.post("/admin/items/{sku}/adjust", response_model=InventoryItemDto)
-def adjust_stock(
+async def adjust_stock(
     sku: str,
     payload: AdjustStockRequest,
+    location: str = Query(DEFAULT_LOCATION, description="Lokasi / gudang"),
     _admin=Depends(require_role("admin")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
 ):
     try:
-        item = service.adjust_stock(sku, payload.delta, payload.reason)
+        item = await service.adjust_stock(sku, payload.delta, payload.reason, location=location)
         return to_item_dto(item)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.get("/admin/cache/availability", response_model=AvailabilityCacheStats)
+async def availability_cache_stats(
+    _admin=Depends(require_role("admin")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
+):
+    return service.availability_cache.stats()
+
+
+@app.get("/admin/debug/slow-requests", response_model=SlowRequestsResponse)
+async def list_slow_requests(
+    limit: Optional[int] = Query(None, ge=1),
+    _admin=Depends(require_role("admin")),
+):
+    """
+    Request terlambat yang diprofile (query + durasi + dugaan N+1), urut dari
+    yang paling lambat. Mode default: kirim header `X-Query-Profile: 1` sebagai admin.
+    """
+    return SlowRequestsResponse(
+        mode=profiling.QUERY_PROFILE_MODE, capacity=slow_requests.size, requests=slow_requests.slowest(limit)
+    )
+
+
+@app.delete("/admin/debug/slow-requests", status_code=204)
+async def clear_slow_requests(_admin=Depends(require_role("admin"))):
+    slow_requests.clear()
+
+
+@app.get("/admin/reservations/sweeper", response_model=ReservationSweeperStats)
+async def reservation_sweeper_stats(_admin=Depends(require_role("admin"))):
+    """Lag (umur reservation expired tertua) dan throughput sweep terakhir."""
+    return sweeper.stats()
+
+
+@app.get("/admin/summary/reconciler", response_model=SummaryReconcilerStats)
+async def summary_reconciler_stats(_admin=Depends(require_role("admin"))):
+    """Hasil rekonsiliasi inventory_summary terakhir (drift = actual - counter)."""
+    return reconciler.stats()
+
+
+@app.post("/admin/summary/reconcile", response_model=SummaryReconcilerStats)
+async def reconcile_summary(_admin=Depends(require_role("admin"))):
+    """Jalankan rekonsiliasi penuh sekarang (mis. setelah edit data langsung di DB)."""
+    await reconciler.reconcile_once()
+    return reconciler.stats()
+
+
 # =============================================================
 # CLIENT / OHS ENDPOINTS
 # =============================================================
 
 @app.get("/ohs/availability/{sku}", response_model=InventoryStats)
-def availability(
+async def availability(
     sku: str,
+    location: str = Query(DEFAULT_LOCATION, description="Lokasi / gudang"),
     _client=Depends(require_role("client")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
 ):
     try:
-        stats = service.get_availability(sku)
+        stats = await service.get_availability(sku, location)
         return InventoryStats(**stats)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
+@app.post("/ohs/availability:batch", response_model=BatchAvailabilityResponse)
+async def availability_batch(
+    payload: BatchAvailabilityRequest,
+    _client=Depends(require_role("client")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
+):
+    """Availability banyak SKU (mis. satu keranjang) dalam satu request."""
+    items, not_found = await service.get_availability_many(payload.skus, payload.location)
+    return BatchAvailabilityResponse(items=items, not_found=not_found)
+
+
 @app.post("/ohs/{sku}/increase", response_model=InventoryItemDto)
-def increase_stock(
+async def increase_stock(
     sku: str,
     payload: IncreaseStockRequest,
+    location: str = Query(DEFAULT_LOCATION, description="Lokasi / gudang"),
     _client=Depends(require_role("client")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
 ):
     try:
-        item = service.increase_stock(sku, payload.qty, payload.reason)
+        item = await service.increase_stock(sku, payload.qty, payload.reason, location=location)
         return to_item_dto(item)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.post("/ohs/{sku}/decrease", response_model=InventoryItemDto)
-def decrease_stock(
+async def decrease_stock(
     sku: str,
     payload: DecreaseStockRequest,
+    location: str = Query(DEFAULT_LOCATION, description="Lokasi / gudang"),
     _client=Depends(require_role("client")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
 ):
     try:
-        item = service.decrease_stock(sku, payload.qty, payload.reason)
+        item = await service.decrease_stock(sku, payload.qty, payload.reason, location=location)
         return to_item_dto(item)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.post("/ohs/{sku}/reserve", response_model=InventoryItemDto)
-def reserve(
+async def reserve(
     sku: str,
     payload: ReserveStockRequest,
-    _client=Depends(require_role("client"))
+    location: str = Query(DEFAULT_LOCATION, description="Lokasi / gudang"),
+    _client=Depends(require_role("client")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
 ):
     try:
-        item, _res = service.reserve_stock(sku, payload.order_id, payload.qty)
+        item, _res = await service.reserve_stock(
+            sku, payload.order_id, payload.qty, payload.ttl_seconds, location=location
+        )
         return to_item_dto(item)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post("/ohs/reservations:batch", response_model=BatchReserveResponse)
+async def reserve_batch(
+    payload: BatchReserveRequest,
+    _client=Depends(require_role("client")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
+):
+    lines = [(line.sku, line.order_id, line.qty) for line in payload.lines]
+    committed, results = await service.reserve_batch(
+        lines, payload.all_or_nothing, payload.ttl_seconds, location=payload.location
+    )
+    response = BatchReserveResponse(committed=committed, results=results)
+    if payload.all_or_nothing and not committed:
+        raise HTTPException(status_code=400, detail=response.model_dump())
+    return response
+
+
 @app.post("/ohs/{sku}/release", response_model=InventoryItemDto)
-def release_reservation(
+async def release_reservation(
     sku: str,
     payload: ReleaseReservationRequest,
+    location: str = Query(DEFAULT_LOCATION, description="Lokasi / gudang"),
     _client=Depends(require_role("client")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
 ):
     try:
-        item = service.release_reservation(sku, payload.reservation_id)
+        item = await service.release_reservation(sku, payload.reservation_id, location=location)
         return to_item_dto(item)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post("/ohs/orders/{order_id}/release", response_model=ReleaseOrderResponse)
+async def release_order(
+    order_id: str,
+    _client=Depends(require_role("client")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
+):
+    """Order dibatalkan: lepas semua reservation order ini di semua SKU (satu transaksi)."""
+    try:
+        released = await service.release_order(order_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return ReleaseOrderResponse(order_id=order_id, released=released)
+
+
 @app.get("/ohs/{sku}/reservations", response_model=List[ReservationDto])
-def list_reservations(
+async def list_reservations(
     sku: str,
+    location: str = Query(DEFAULT_LOCATION, description="Lokasi / gudang"),
     _client=Depends(require_role("client")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
 ):
     try:
-        item = service.get_item(sku)
+        item = await service.get_item(sku, location)
         return [
             ReservationDto(
                 id=r.id,
                 order_id=r.order_id,
                 reserved_qty=r.reserved_qty.amount,
+                expires_at=r.expires_at,
             )
             for r in item.reservations
         ]
@@ -349,10 +737,135 @@ def list_reservations(
         raise HTTPException(status_code=404, detail=str(e))
 
 
+@app.get("/ohs/{sku}/locations", response_model=List[InventoryStats])
+async def list_locations(
+    sku: str,
+    _client=Depends(require_role("client")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
+):
+    """Stok SKU di setiap lokasi, urut available terbesar."""
+    return await service.get_locations(sku)
+
+
+@app.get("/ohs/{sku}/allocation", response_model=List[InventoryStats])
+async def allocation(
+    sku: str,
+    qty: int = Query(..., ge=1),
+    _client=Depends(require_role("client")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
+):
+    """
+    Kandidat lokasi yang bisa memenuhi `qty` (available >= qty), urut
+    available terbesar; maksimal ALLOCATION_CANDIDATES baris.
+    """
+    return await service.allocate(sku, qty)
+
+
+@app.post("/ohs/{sku}/allocate", response_model=InventoryItemDto)
+async def reserve_allocated(
+    sku: str,
+    payload: ReserveStockRequest,
+    _client=Depends(require_role("client")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
+):
+    """Reserve di lokasi kandidat pertama yang masih cukup (lokasi ada di response)."""
+    try:
+        item, _res = await service.reserve_allocated(sku, payload.order_id, payload.qty, payload.ttl_seconds)
+        return to_item_dto(item)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # =============================================================
 # MANAGER ENDPOINTS
 # =============================================================
 
 @app.get("/manager/low-stock", response_model=List[InventoryItemDto])
-def low_stock(_manager=Depends(require_role("manager"))):
-    return [to_item_dto(i) for i in service.get_low_stock_items()]
+async def low_stock(
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = Query(None, description="Cursor: SKU terakhir dari halaman sebelumnya"),
+    include_reservations: bool = True,
+    location: str = Query(DEFAULT_LOCATION, description="Lokasi / gudang"),
+    _manager=Depends(require_role("manager")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
+):
+    rows, res_rows, next_cursor = await service.list_item_rows_page(
+        after, limit, low_stock_only=True, include_reservations=include_reservations, location=location
+    )
+    return _json_page(rows, res_rows, next_cursor)
+
+
+@app.get("/manager/summary", response_model=InventorySummary)
+async def inventory_summary(
+    top: int = Query(10, ge=0, le=100, description="Jumlah SKU dengan reserved terbesar"),
+    _manager=Depends(require_role("manager")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
+):
+    """
+    Total dashboard dari tabel inventory_summary (dijaga di transaksi yang
+    sama dengan setiap write), bukan scan seluruh SKU.
+    """
+    return await service.get_summary(top)
+
+
+# =============================================================
+# CHANGE FEED (outbox inventory_events)
+# =============================================================
+
+
+@app.get("/events", response_model=List[EventDto])
+async def list_events(
+    after: int = Query(0, ge=0, description="Cursor: seq event terakhir yang sudah diproses"),
+    limit: int = Query(100, ge=1, le=1000),
+    sku: Optional[str] = None,
+    location: Optional[str] = None,
+    _admin=Depends(require_role("admin")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
+):
+    """
+    Event setiap mutasi inventory (urut seq), pengganti polling /admin/items
+    (karena itu admin saja, sama seperti /admin/items).
+    Cursor berikutnya di header X-Next-Cursor (tidak ada kalau belum ada event baru).
+    """
+    rows, next_cursor = await service.list_events(after, limit, sku, location)
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else None
+    return Response(events_json(rows), media_type=JSON_MEDIA_TYPE, headers=headers)
+
+
+@app.get(
+    "/events/stream",
+    response_class=StreamingResponse,
+    responses={200: {"description": "Frame SSE; field data = EventDto", "content": {SSE_MEDIA_TYPE: {}}}},
+)
+async def stream_events(
+    request: Request,
+    after: int = Query(0, ge=0),
+    sku: Optional[str] = None,
+    location: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None),
+    _admin=Depends(require_role("admin")),
+    service: AsyncInventoryService = Depends(get_inventory_service),
+):
+    """
+    Server-Sent Events: event baru dikirim begitu terbaca dari outbox
+    (poll tiap EVENT_STREAM_POLL_SECONDS). Reconnect EventSource mengirim
+    Last-Event-ID, jadi stream lanjut dari event terakhir yang diterima.
+    """
+    if last_event_id and last_event_id.isdigit():
+        after = max(after, int(last_event_id))
+
+    async def body():
+        last_sent = time.monotonic()
+        async for rows in service.follow_events(after, sku, location=location):
+            if await request.is_disconnected():
+                break
+            if rows:
+                yield events_sse(rows)
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= EVENT_STREAM_HEARTBEAT_SECONDS:
+                yield b": keep-alive\n\n"
+                last_sent = time.monotonic()
+
+    return StreamingResponse(
+        body(), media_type=SSE_MEDIA_TYPE, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,252 @@
+"""
+Metrics in-process dengan format teks Prometheus (GET /metrics), tanpa dependency.
+
+- MetricsMiddleware (ASGI murni): jumlah request + histogram latency per
+  route template, jumlah query DB per request, dan durasi per stage
+- stage() / stage_timer(): catat durasi stage (auth, repo_read, domain,
+  repo_save, serialization) ke request yang sedang berjalan
+- instrument_engine(): hitung query lewat event before_cursor_execute
+- REGISTRY.register_collector(): gauge yang dibaca saat scrape (cache, sweeper)
+
+Nilai per worker (proses); agregasi antar worker dilakukan Prometheus.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+# detik; stage di bawah 1 ms tetap terlihat
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+# (name, type, help, [(labels, value)]) dari collector
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket (+Inf terakhir), sum]
+        self._values: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((labels, list(counts), total) for labels, (counts, total) in self._values.items())
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list = []
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]):
+        """collector() dipanggil saat scrape dan mengembalikan Family (gauge/counter dari state lain)."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "wms_http_requests_total", "HTTP requests by method, route template and status.", ("method", "route", "status")
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "wms_http_request_duration_seconds", "HTTP request latency (until the last body chunk is sent).", ("method", "route")
+)
+STAGE_LATENCY = REGISTRY.histogram(
+    "wms_stage_duration_seconds", "Time spent per stage within one request.", ("route", "stage")
+)
+DB_QUERIES = REGISTRY.histogram(
+    "wms_db_queries_per_request", "SQL statements executed per request.", ("route",), QUERY_COUNT_BUCKETS
+)
+
+
+class _RequestMetrics:
+    # objek mutable: context yang di-copy (threadpool, greenlet SQLAlchemy async) tetap menulis ke sini
+    __slots__ = ("queries", "stages")
+
+    def __init__(self):
+        self.queries = 0
+        self.stages: Dict[str, float] = {}
+
+    def add_stage(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+
+_current: ContextVar[Optional[_RequestMetrics]] = ContextVar("wms_request_metrics", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    """Catat durasi blok ke stage `name` request aktif (di luar request: no-op)."""
+    current = _current.get()
+    if current is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        current.add_stage(name, time.perf_counter() - start)
+
+
+class _StageTimer:
+    """
+    Untuk stage yang tidak bisa dibungkus satu `with` (mis. read/save di
+    dalam lock_for_update): mark(name) mencatat waktu sejak mark sebelumnya.
+    """
+
+    __slots__ = ("_current", "_last")
+
+    def __init__(self):
+        self._current = _current.get()
+        self._last = time.perf_counter() if self._current is not None else 0.0
+
+    def mark(self, name: str):
+        if self._current is None:
+            return
+        now = time.perf_counter()
+        self._current.add_stage(name, now - self._last)
+        self._last = now
+
+
+def stage_timer() -> _StageTimer:
+    return _StageTimer()
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    current = _current.get()
+    if current is not None:
+        current.queries += 1
+
+
+_instrumented: set = set()
+
+
+def instrument_engine(sync_engine):
+    """Pasang penghitung query (engine async: kirim engine.sync_engine). Idempotent."""
+    if id(sync_engine) in _instrumented:
+        return
+    _instrumented.add(id(sync_engine))
+    event.listen(sync_engine, "before_cursor_execute", _count_query)
+
+
+def route_template(scope) -> str:
+    route = scope.get("route")
+    # path mentah tidak dipakai: /ohs/{sku}/reserve per SKU = kardinalitas label tak terbatas
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware murni (tanpa BaseHTTPMiddleware: tidak ada task/queue tambahan per request)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        current = _RequestMetrics()
+        token = _current.set(current)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current.reset(token)
+            route = route_template(scope)
+            HTTP_REQUESTS.inc(scope["method"], route, str(status))
+            HTTP_LATENCY.observe(elapsed, scope["method"], route)
+            DB_QUERIES.observe(current.queries, route)
+            for name, seconds in current.stages.items():
+                STAGE_LATENCY.observe(seconds, route, name)
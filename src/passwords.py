@@ -0,0 +1,121 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from passlib.context import CryptContext
+
+# ==========================
+# CONFIG
+# ==========================
+# cost bcrypt (2^rounds iterasi). Hash dengan cost lebih rendah di-upgrade
+# otomatis saat login berikutnya berhasil (verify_and_update).
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# 0 = tanpa process pool, bcrypt jalan di threadpool (test / dev)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# job hash/verify yang boleh antre + jalan sekaligus; di atas ini request ditolak (503)
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(max(1, PASSWORD_HASH_WORKERS) * 8)))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,  # rounds < ini -> needs_update
+)
+
+
+# dipanggil di worker process: harus fungsi level modul (picklable)
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password(plain: str, hashed: str) -> bool:
+    return pwd_context.verify(plain, hashed)
+
+
+def verify_and_update(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """(valid, hash baru kalau cost hash lama sudah di bawah BCRYPT_ROUNDS)."""
+    return pwd_context.verify_and_update(plain, hashed)
+
+
+class PasswordHasherBusy(Exception):
+    """Queue hash/verify sudah penuh; caller sebaiknya membalas 503 + Retry-After."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt off the request path, in a bounded process pool.
+
+    bcrypt is pure CPU (~100-300 ms per call at cost 12); in the threadpool
+    it occupies the same worker threads (and cores) inventory requests use.
+    A separate process pool isolates that cost, and `max_pending` bounds the
+    queue so a login burst fails fast with PasswordHasherBusy instead of
+    queueing for seconds.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0  # exception atau dibatalkan (mis. client disconnect)
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: fork dari proses yang punya thread (engine pool, aiosqlite) bisa deadlock
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    async def _submit(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy("Too many concurrent password operations")
+            self.pending += 1
+        ok = False
+        try:
+            if self.workers <= 0:
+                result = await run_in_threadpool(fn, *args)
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+            ok = True
+            return result
+        finally:
+            with self._lock:
+                self.pending -= 1
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(hash_password, password)
+
+    async def verify_and_update(self, plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return await self._submit(verify_and_update, plain, hashed)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher()
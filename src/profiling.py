@@ -0,0 +1,199 @@
+"""
+Query profiling per request (opt-in) + log request paling lambat.
+
+QUERY_PROFILE_MODE:
+- header (default): hanya request admin dengan header `X-Query-Profile: 1`
+- all: semua request (staging / investigasi; ada overhead per query)
+- off
+
+Request yang diprofile mencatat setiap statement SQL + durasinya
+(before/after_cursor_execute), menandai pola N+1 (statement sama berulang
+>= N_PLUS_ONE_THRESHOLD kali), mengirim ringkasan di response header
+X-Query-Count / X-Query-Time-Ms, lalu ditawarkan ke SlowRequestLog
+(GET /admin/debug/slow-requests).
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import event
+
+from src.metrics import route_template
+
+QUERY_PROFILE_MODE = os.getenv("QUERY_PROFILE_MODE", "header")
+QUERY_PROFILE_HEADER = b"x-query-profile"
+# statement per request yang disimpan lengkap; sisanya hanya dihitung
+QUERY_PROFILE_MAX_STATEMENTS = int(os.getenv("QUERY_PROFILE_MAX_STATEMENTS", "500"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+SLOW_REQUEST_LOG_SIZE = int(os.getenv("SLOW_REQUEST_LOG_SIZE", "50"))
+
+
+class QueryProfile:
+    __slots__ = ("method", "path", "started_at", "start", "duration", "status", "role",
+                 "statements", "query_count", "query_time")
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.started_at = datetime.utcnow()
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        self.status = 500
+        self.role: Optional[str] = None
+        self.statements: List[tuple] = []
+        self.query_count = 0
+        self.query_time = 0.0
+
+    def record(self, statement: str, seconds: float, executemany: bool):
+        self.query_count += 1
+        self.query_time += seconds
+        if len(self.statements) < QUERY_PROFILE_MAX_STATEMENTS:
+            self.statements.append((statement, seconds, executemany))
+
+    def n_plus_one(self) -> List[dict]:
+        """SELECT yang sama (teks SQL identik, parameter beda) berulang >= threshold kali."""
+        counts = {}
+        for statement, _, _ in self.statements:
+            if statement.lstrip()[:6].upper() == "SELECT":
+                counts[statement] = counts.get(statement, 0) + 1
+        return [
+            {"statement": statement, "count": count}
+            for statement, count in sorted(counts.items(), key=lambda kv: -kv[1])
+            if count >= N_PLUS_ONE_THRESHOLD
+        ]
+
+    def to_dict(self, route: str) -> dict:
+        return {
+            "method": self.method,
+            "path": self.path,
+            "route": route,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "query_count": self.query_count,
+            "query_time_ms": round(self.query_time * 1000, 3),
+            "truncated": self.query_count > len(self.statements),
+            "n_plus_one": self.n_plus_one(),
+            "queries": [
+                {"statement": statement, "duration_ms": round(seconds * 1000, 3), "executemany": executemany}
+                for statement, seconds, executemany in self.statements
+            ],
+        }
+
+
+class SlowRequestLog:
+    """Top-N request paling lambat (min-heap berukuran tetap). Thread-safe."""
+
+    def __init__(self, size: int = SLOW_REQUEST_LOG_SIZE):
+        self.size = size
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()  # tie-breaker: dict tidak bisa dibandingkan
+        self._lock = threading.Lock()
+
+    def offer(self, profile: QueryProfile, route: str):
+        """Simpan kalau termasuk N terlambat; to_dict() hanya dibangun untuk yang masuk."""
+        with self._lock:
+            full = len(self._heap) >= self.size
+            if full and profile.duration <= self._heap[0][0]:
+                return
+            item = (profile.duration, next(self._seq), profile.to_dict(route))
+            if full:
+                heapq.heapreplace(self._heap, item)
+            else:
+                heapq.heappush(self._heap, item)
+
+    def slowest(self, limit: Optional[int] = None) -> List[dict]:
+        with self._lock:
+            items = sorted(self._heap, reverse=True)
+        return [entry for _, _, entry in items[:limit]]
+
+    def clear(self):
+        with self._lock:
+            self._heap.clear()
+
+
+slow_requests = SlowRequestLog()
+
+_profile: ContextVar[Optional[QueryProfile]] = ContextVar("wms_query_profile", default=None)
+
+
+def note_principal(role: str):
+    """Dipanggil setelah autentikasi: mode header hanya aktif untuk admin."""
+    profile = _profile.get()
+    if profile is not None:
+        profile.role = role
+
+
+def _enabled(profile: QueryProfile) -> bool:
+    return QUERY_PROFILE_MODE == "all" or profile.role == "admin"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _profile.get() is not None and context is not None:
+        context._wms_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _profile.get()
+    start = getattr(context, "_wms_query_start", None)
+    if profile is not None and start is not None:
+        profile.record(statement, time.perf_counter() - start, executemany)
+
+
+_instrumented: set = set()
+
+
+def instrument_engine(sync_engine):
+    """Pasang hook profiling (engine async: kirim engine.sync_engine). Idempotent."""
+    if id(sync_engine) in _instrumented:
+        return
+    _instrumented.add(id(sync_engine))
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _wants_profile(scope) -> bool:
+    if QUERY_PROFILE_MODE == "all":
+        return True
+    if QUERY_PROFILE_MODE != "header":
+        return False
+    return any(name == QUERY_PROFILE_HEADER and value in (b"1", b"true") for name, value in scope["headers"])
+
+
+class ProfilingMiddleware:
+    """ASGI middleware; request tanpa profiling hanya membayar satu cek header."""
+
+    def __init__(self, app, slow_log: SlowRequestLog = slow_requests):
+        self.app = app
+        self.slow_log = slow_log
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile(scope["method"], scope["path"])
+        token = _profile.set(profile)
+
+        async def send_with_summary(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                if _enabled(profile):
+                    message = {**message, "headers": list(message.get("headers", [])) + [
+                        (b"x-query-count", str(profile.query_count).encode()),
+                        (b"x-query-time-ms", f"{profile.query_time * 1000:.3f}".encode()),
+                    ]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_summary)
+        finally:
+            _profile.reset(token)
+            profile.duration = time.perf_counter() - profile.start
+            if _enabled(profile):
+                self.slow_log.offer(profile, route_template(scope))
@@ -0,0 +1,242 @@
+import hashlib
+import heapq
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+
+from src.db import SessionLocal, RevokedTokenModel, _revocation_lock_stmt
+
+# ==========================
+# CONFIG
+# ==========================
+# "sql" = tabel revoked_tokens (shared antar worker), "memory" = per-process
+REVOCATION_BACKEND = os.getenv("TOKEN_REVOCATION_BACKEND", "sql")
+# seberapa sering tiap worker menarik revocation baru dari tabel (detik).
+# Logout di worker lain paling lambat terlihat setelah interval ini.
+REVOCATION_SYNC_SECONDS = float(os.getenv("TOKEN_REVOCATION_SYNC_SECONDS", "1"))
+REVOCATION_PRUNE_SECONDS = float(os.getenv("TOKEN_REVOCATION_PRUNE_SECONDS", "60"))
+BLOOM_CAPACITY = int(os.getenv("TOKEN_REVOCATION_BLOOM_CAPACITY", "100000"))
+BLOOM_ERROR_RATE = 0.001
+# baris revoked_tokens dengan prefix ini bukan token, tapi broadcast
+# "principal user X berubah" (role / disabled) ke principal cache worker lain
+PRINCIPAL_CHANGE_PREFIX = "principal:"
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over string keys.
+    No false negatives; false positives at roughly `error_rate` while the
+    number of keys stays under `capacity`.
+    """
+
+    def __init__(self, capacity: int = BLOOM_CAPACITY, error_rate: float = BLOOM_ERROR_RATE):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+# ==========================
+# REVOCATION STORES
+# ==========================
+
+class RevocationStore:
+    """
+    Interface: revoked token ids (jti) that are remembered until their exp.
+
+    The same channel carries principal changes: publish_principal_change()
+    makes every worker call on_principal_change(username) at its next sync.
+    """
+
+    on_principal_change: Optional[Callable[[str], None]] = None
+
+    def revoke(self, jti: str, expires_at: datetime):
+        raise NotImplementedError
+
+    def is_revoked(self, jti: str) -> bool:
+        raise NotImplementedError
+
+    def is_revoked_cached(self, jti: str) -> Optional[bool]:
+        """
+        Answer from process memory only (safe to call on the event loop).
+        None means "unknown": call is_revoked, which may hit the DB.
+        """
+        return None
+
+    def publish_principal_change(self, username: str, ttl_seconds: float):
+        """
+        Broadcast that `username` changed. Only the local process is notified
+        here; shared stores override this. `ttl_seconds` = how long the
+        broadcast must stay visible (principal cache TTL).
+        """
+        self._notify_principal_change(username)
+
+    def _notify_principal_change(self, username: str):
+        if self.on_principal_change is not None:
+            self.on_principal_change(username)
+
+
+class InMemoryRevocationStore(RevocationStore):
+    """Process-local store (single worker / tests). Pruned lazily at each token's exp."""
+
+    def __init__(self):
+        self._expiry: Dict[str, datetime] = {}
+        self._heap: List[Tuple[datetime, str]] = []
+        self._lock = threading.Lock()
+
+    def revoke(self, jti: str, expires_at: datetime):
+        with self._lock:
+            self._expiry[jti] = expires_at
+            heapq.heappush(self._heap, (expires_at, jti))
+
+    def is_revoked(self, jti: str) -> bool:
+        with self._lock:
+            self._prune(datetime.utcnow())
+            return jti in self._expiry
+
+    def is_revoked_cached(self, jti: str) -> Optional[bool]:
+        return self.is_revoked(jti)
+
+    def _prune(self, now: datetime):
+        while self._heap and self._heap[0][0] <= now:
+            _, jti = heapq.heappop(self._heap)
+            self._expiry.pop(jti, None)
+
+    def __len__(self):
+        return len(self._expiry)
+
+
+class SQLRevocationStore(RevocationStore):
+    """
+    Shared store backed by the revoked_tokens table, guarded by an
+    in-process Bloom filter:
+    - the Bloom filter holds every jti seen in the table (synced
+      incrementally by seq every REVOCATION_SYNC_SECONDS) plus local revokes
+    - a Bloom miss means "not revoked" without touching the DB
+    - a Bloom hit is confirmed with a primary-key lookup (false positives)
+    Expired rows are deleted every REVOCATION_PRUNE_SECONDS and the filter
+    is rebuilt, so memory and table size follow the live revocations only.
+    Principal changes are rows with PRINCIPAL_CHANGE_PREFIX: a worker drops
+    its cached principal at the first sync that sees the row.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        sync_seconds: float = REVOCATION_SYNC_SECONDS,
+        prune_seconds: float = REVOCATION_PRUNE_SECONDS,
+        bloom_capacity: int = BLOOM_CAPACITY,
+    ):
+        self.session_factory = session_factory
+        self.sync_seconds = sync_seconds
+        self.prune_seconds = prune_seconds
+        self.bloom_capacity = bloom_capacity
+        self._bloom = BloomFilter(bloom_capacity)
+        self._last_seq = 0
+        self._next_sync = 0.0
+        self._next_prune = 0.0
+        self._lock = threading.Lock()
+
+    def revoke(self, jti: str, expires_at: datetime):
+        with self.session_factory() as db:
+            # PostgreSQL: seq = urutan commit, supaya sync `seq > _last_seq` tidak
+            # melewatkan revoke yang commit belakangan (lihat _outbox_lock_stmt)
+            lock = _revocation_lock_stmt(db.get_bind().dialect.name)
+            if lock is not None:
+                db.execute(lock)
+            db.add(RevokedTokenModel(jti=jti, expires_at=expires_at))
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()  # sudah di-revoke sebelumnya
+        with self._lock:
+            self._bloom.add(jti)
+
+    def publish_principal_change(self, username: str, ttl_seconds: float):
+        # jti unik per perubahan; baris di-prune setelah TTL cache principal
+        # lewat (entry cache yang lebih tua dari itu sudah expired sendiri)
+        jti = f"{PRINCIPAL_CHANGE_PREFIX}{username}:{uuid4().hex}"
+        self.revoke(jti, datetime.utcnow() + timedelta(seconds=ttl_seconds))
+        self._notify_principal_change(username)
+
+    def is_revoked(self, jti: str) -> bool:
+        self._maybe_sync()
+        if jti not in self._bloom:
+            return False
+        with self.session_factory() as db:
+            row = db.execute(
+                select(RevokedTokenModel.expires_at).where(RevokedTokenModel.jti == jti)
+            ).first()
+        return row is not None and row.expires_at > datetime.utcnow()
+
+    def is_revoked_cached(self, jti: str) -> Optional[bool]:
+        # Bloom miss between syncs -> definitely not revoked, no I/O
+        if time.monotonic() < self._next_sync and jti not in self._bloom:
+            return False
+        return None
+
+    def _maybe_sync(self):
+        now = time.monotonic()
+        if now < self._next_sync:
+            return
+        with self._lock:
+            if now < self._next_sync:
+                return
+            with self.session_factory() as db:
+                if now >= self._next_prune:
+                    self._prune_and_rebuild(db)
+                    self._next_prune = now + self.prune_seconds
+                else:
+                    rows = db.execute(
+                        select(RevokedTokenModel.seq, RevokedTokenModel.jti)
+                        .where(RevokedTokenModel.seq > self._last_seq)
+                    ).all()
+                    for seq, jti in rows:
+                        self._bloom.add(jti)
+                        self._last_seq = max(self._last_seq, seq)
+                        self._on_new_row(jti)
+            self._next_sync = now + self.sync_seconds
+
+    def _prune_and_rebuild(self, db):
+        db.execute(delete(RevokedTokenModel).where(RevokedTokenModel.expires_at <= datetime.utcnow()))
+        db.commit()
+        rows = db.execute(select(RevokedTokenModel.seq, RevokedTokenModel.jti)).all()
+        bloom = BloomFilter(max(self.bloom_capacity, 2 * len(rows)))
+        last_seq = 0
+        for seq, jti in rows:
+            bloom.add(jti)
+            last_seq = max(last_seq, seq)
+            if seq > self._last_seq:  # belum terlihat di sync inkremental
+                self._on_new_row(jti)
+        self._bloom = bloom
+        self._last_seq = last_seq
+
+    def _on_new_row(self, jti: str):
+        if jti.startswith(PRINCIPAL_CHANGE_PREFIX):
+            username = jti[len(PRINCIPAL_CHANGE_PREFIX):].rsplit(":", 1)[0]
+            self._notify_principal_change(username)
+
+
+def create_revocation_store() -> RevocationStore:
+    if REVOCATION_BACKEND == "memory":
+        return InMemoryRevocationStore()
+    return SQLRevocationStore()
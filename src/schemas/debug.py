@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import List
+
+from pydantic import BaseModel
+
+
+class ProfiledQuery(BaseModel):
+    statement: str
+    duration_ms: float
+    executemany: bool
+
+
+class NPlusOneSuspect(BaseModel):
+    statement: str
+    count: int
+
+
+class SlowRequest(BaseModel):
+    method: str
+    path: str
+    route: str
+    status: int
+    started_at: datetime
+    duration_ms: float
+    query_count: int
+    query_time_ms: float
+    truncated: bool  # query_count > len(queries)
+    n_plus_one: List[NPlusOneSuspect]
+    queries: List[ProfiledQuery]
+
+
+class SlowRequestsResponse(BaseModel):
+    mode: str
+    capacity: int
+    requests: List[SlowRequest]
@@ -1,16 +1,21 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+from src.domain.inventory import DEFAULT_LOCATION
 
 
 class ReservationDto(BaseModel):
     id: str
     order_id: str
     reserved_qty: int
+    expires_at: Optional[datetime] = None
 
 
 class InventoryItemDto(BaseModel):
     id: str
     sku: str
+    location: str
     on_hand: int
     reserved: int
     available: int
@@ -20,8 +25,20 @@ class InventoryItemDto(BaseModel):
     reservations: List[ReservationDto] = []
 
 
+class StockMoveDto(BaseModel):
+    id: str
+    sku: str
+    location: str
+    movement_type: str
+    qty: int
+    uom: str
+    reason: Optional[str] = None
+    created_at: datetime
+
+
 class CreateItemRequest(BaseModel):
     sku: str
+    location: str = DEFAULT_LOCATION
     initial_qty: int = 0
     uom: str = "pcs"
     min_qty: int = 0
@@ -40,12 +57,51 @@ class DecreaseStockRequest(BaseModel):
 class ReserveStockRequest(BaseModel):
     order_id: str
     qty: int
+    ttl_seconds: Optional[int] = Field(None, gt=0)  # None = tidak expire
+
+
+class BatchReserveLine(BaseModel):
+    sku: str
+    order_id: str
+    qty: int
+
+
+class BatchReserveRequest(BaseModel):
+    lines: List[BatchReserveLine] = Field(..., max_length=1000)
+    all_or_nothing: bool = True  # False = best-effort
+    ttl_seconds: Optional[int] = Field(None, gt=0)  # berlaku untuk semua line
+    location: str = DEFAULT_LOCATION  # semua line dari satu lokasi
+
+
+class BatchReserveLineResult(BaseModel):
+    sku: str
+    order_id: str
+    qty: int
+    reservation_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchReserveResponse(BaseModel):
+    committed: bool
+    results: List[BatchReserveLineResult]
 
 
 class ReleaseReservationRequest(BaseModel):
     reservation_id: str
 
 
+class ReleasedReservationDto(BaseModel):
+    sku: str
+    location: str
+    reservation_id: str
+    qty: int
+
+
+class ReleaseOrderResponse(BaseModel):
+    order_id: str
+    released: List[ReleasedReservationDto]
+
+
 class AdjustStockRequest(BaseModel):
     delta: int
     reason: Optional[str] = "ADJUST"
@@ -57,8 +113,112 @@ class SetThresholdRequest(BaseModel):
 
 class InventoryStats(BaseModel):
     sku: str
+    location: str
     on_hand: int
     reserved: int
     available: int
     uom: str
     low_stock: bool
+
+
+class BatchAvailabilityRequest(BaseModel):
+    skus: List[str] = Field(..., min_length=1, max_length=1000)
+    location: str = DEFAULT_LOCATION
+
+
+class BatchAvailabilityResponse(BaseModel):
+    items: List[InventoryStats]
+    not_found: List[str]
+
+
+class AvailabilityCacheStats(BaseModel):
+    size: int
+    max_size: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    hit_ratio: float
+    evictions: int
+    invalidations: int
+
+
+class PeriodicWorkerStats(BaseModel):
+    # field bersama semua PeriodicWorker (src/services/periodic.py)
+    interval_seconds: float
+    runs: int
+    errors: int
+    last_duration_seconds: float
+    last_run_at: Optional[datetime] = None
+
+
+class ReservationSweeperStats(PeriodicWorkerStats):
+    batch_size: int
+    batches: int
+    released_total: int
+    last_released: int
+    last_throughput_per_second: float
+    last_lag_seconds: float
+
+
+class UomSummary(BaseModel):
+    uom: str
+    sku_count: int
+    on_hand: int
+    reserved: int
+    available: int
+    low_stock_count: int
+
+
+class TopReservedItem(BaseModel):
+    sku: str
+    location: str
+    uom: str
+    on_hand: int
+    reserved: int
+    available: int
+
+
+class InventorySummary(BaseModel):
+    sku_count: int
+    low_stock_count: int
+    by_uom: List[UomSummary]  # quantity hanya dijumlah per UOM
+    top_reserved: List[TopReservedItem]
+
+
+class SummaryReconcilerStats(PeriodicWorkerStats):
+    drift_runs: int
+    last_drift: Dict[str, Dict[str, int]]  # {uom: {counter: actual - stored}}
+
+
+class ImportRowError(BaseModel):
+    line: int
+    sku: Optional[str] = None
+    error: str
+
+
+class ImportItemsResponse(BaseModel):
+    format: str
+    on_conflict: str
+    rows: int
+    inserted: int
+    updated: int
+    skipped: int
+    error_count: int
+    errors: List[ImportRowError]  # sampel, maksimal IMPORT_MAX_ERROR_SAMPLES
+    chunks: int
+    duration_seconds: float
+
+
+class EventDto(BaseModel):
+    seq: int  # cursor: GET /events?after=<seq>
+    id: str
+    sku: str
+    location: str
+    type: str
+    version: int
+    # state item setelah transaksi yang menulis event ini
+    on_hand: int
+    reserved: int
+    available: int
+    data: dict
+    created_at: datetime
@@ -0,0 +1,161 @@
+"""
+Serialisasi response inventory.
+
+Dua jalur untuk bentuk JSON yang sama (InventoryItemDto):
+- to_item_dto: domain -> Pydantic DTO (endpoint single item)
+- items_json / items_ndjson: baris repository (ITEM_ROW_COLUMNS /
+  RESERVATION_ROW_COLUMNS di src/db.py) langsung ke bytes JSON, tanpa
+  domain object, DTO, maupun validasi response_model (endpoint listing)
+- items_csv: baris yang sama ke CSV (export bulk, format import item)
+- events_json / events_sse: baris outbox (EVENT_ROW_COLUMNS) untuk change feed
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+try:
+    import orjson
+except ImportError:  # fallback: stdlib json (lebih lambat, output sama)
+    orjson = None
+
+from src.metrics import stage
+from src.schemas.inventory import InventoryItemDto, ReservationDto
+
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+SSE_MEDIA_TYPE = "text/event-stream"
+# urutan kolom = ITEM_ROW_COLUMNS
+ITEM_CSV_HEADER = ("id", "sku", "on_hand", "reserved", "available", "uom", "min_qty", "location")
+
+
+# Convert domain → DTO
+def to_item_dto(item) -> InventoryItemDto:
+    with stage("serialization"):
+        return _item_dto(item)
+
+
+def _item_dto(item) -> InventoryItemDto:
+    return InventoryItemDto(
+        id=item.id,
+        sku=item.sku.value,
+        location=item.location,
+        on_hand=item.on_hand.amount,
+        reserved=item.reserved.amount,
+        available=item.available.amount,
+        uom=item.on_hand.uom,
+        min_qty=item.threshold.min_qty,
+        low_stock=item.is_low_stock(),
+        reservations=[
+            ReservationDto(
+                id=r.id,
+                order_id=r.order_id,
+                reserved_qty=r.reserved_qty.amount,
+                expires_at=r.expires_at,
+            )
+            for r in item.reservations
+        ],
+    )
+
+
+def item_dicts(item_rows: Iterable, reservation_rows: Iterable = ()) -> List[dict]:
+    """
+    Baris repository -> dict dengan urutan field InventoryItemDto.
+    Layout tuple tetap, jadi cukup unpack posisi (tanpa lookup nama kolom).
+    Satu panggilan = satu lokasi, jadi reservation cukup dikelompokkan per SKU.
+    """
+    res_by_sku: Dict[str, list] = {}
+    for sku, res_id, order_id, qty, expires_at in reservation_rows:
+        res_by_sku.setdefault(sku, []).append(
+            {"id": res_id, "order_id": order_id, "reserved_qty": qty, "expires_at": expires_at}
+        )
+
+    return [
+        {
+            "id": item_id,
+            "sku": sku,
+            "location": location,
+            "on_hand": on_hand,
+            "reserved": reserved,
+            "available": available,
+            "uom": uom,
+            "min_qty": min_qty,
+            "low_stock": available < min_qty,  # = Threshold.is_low
+            "reservations": res_by_sku.get(sku, []),
+        }
+        for item_id, sku, on_hand, reserved, available, uom, min_qty, location in item_rows
+    ]
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()  # sama dengan Pydantic / orjson untuk datetime naive
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_json_default).encode()
+
+
+def items_json(item_rows: Iterable, reservation_rows: Iterable = ()) -> bytes:
+    """JSON array, identik dengan List[InventoryItemDto]."""
+    with stage("serialization"):
+        return dumps(item_dicts(item_rows, reservation_rows))
+
+
+def items_ndjson(item_rows: Iterable, reservation_rows: Iterable = ()) -> bytes:
+    """Satu objek JSON per baris (untuk streaming per chunk)."""
+    with stage("serialization"):
+        if orjson is not None:
+            option = orjson.OPT_APPEND_NEWLINE
+            return b"".join(orjson.dumps(d, option=option) for d in item_dicts(item_rows, reservation_rows))
+        return b"".join(dumps(d) + b"\n" for d in item_dicts(item_rows, reservation_rows))
+
+
+def items_csv(item_rows: Iterable, header: bool = False) -> bytes:
+    """Baris ITEM_ROW_COLUMNS -> CSV (header opsional, untuk chunk pertama)."""
+    with stage("serialization"):
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+        if header:
+            writer.writerow(ITEM_CSV_HEADER)
+        writer.writerows(item_rows)
+        return buf.getvalue().encode()
+
+
+def event_dicts(event_rows: Iterable) -> List[dict]:
+    """Baris EVENT_ROW_COLUMNS -> dict dengan urutan field EventDto."""
+    return [
+        {
+            "seq": seq,
+            "id": event_id,
+            "sku": sku,
+            "location": location,
+            "type": event_type,
+            "version": version,
+            "on_hand": on_hand,
+            "reserved": reserved,
+            "available": on_hand - reserved,
+            "data": payload,
+            "created_at": created_at,
+        }
+        for seq, event_id, sku, event_type, version, on_hand, reserved, payload, created_at, location in event_rows
+    ]
+
+
+def events_json(event_rows: Iterable) -> bytes:
+    with stage("serialization"):
+        return dumps(event_dicts(event_rows))
+
+
+def events_sse(event_rows: Iterable) -> bytes:
+    """Satu frame Server-Sent Events per event; id = seq (dipakai ulang sebagai Last-Event-ID)."""
+    with stage("serialization"):
+        return b"".join(
+            b"id: %d\nevent: %s\ndata: %s\n\n" % (d["seq"], d["type"].encode(), dumps(d))
+            for d in event_dicts(event_rows)
+        )
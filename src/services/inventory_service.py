@@ -1,73 +1,600 @@
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime
+import asyncio
+import functools
+import inspect
+from typing import Optional, Tuple
 from uuid import uuid4
-from src.domain.inventory import InventoryItem, SKU, Quantity, Threshold
+import os
+import random
+import threading
+import time
 
+from src.domain.inventory import DEFAULT_LOCATION, InventoryItem, SKU, Quantity, Threshold, ConcurrencyConflict
+from src.metrics import stage, stage_timer
+from src.services.item_import import IMPORT_CHUNK_SIZE, import_lines_async
 
-class InventoryService:
-    def __init__(self, repo):
+# berapa kali read-modify-write diulang kalau kena optimistic-concurrency conflict
+MAX_CONFLICT_RETRIES = 3
+# jeda sebelum retry: acak 0..base * 2^attempt (full jitter), supaya writer
+# yang bentrok di SKU yang sama tidak langsung bentrok lagi bersamaan
+CONFLICT_BACKOFF_SECONDS = float(os.getenv("CONFLICT_BACKOFF_SECONDS", "0.01"))
+
+# Availability cache per worker. Write di worker ini langsung meng-update
+# entry; write dari worker lain terlihat paling lambat setelah TTL.
+AVAILABILITY_CACHE_TTL_SECONDS = float(os.getenv("AVAILABILITY_CACHE_TTL_SECONDS", "2"))
+AVAILABILITY_CACHE_MAX_SIZE = int(os.getenv("AVAILABILITY_CACHE_MAX_SIZE", "10000"))
+
+# query alokasi: jumlah lokasi kandidat (terbaik dulu) yang dicoba per reserve
+ALLOCATION_CANDIDATES = int(os.getenv("ALLOCATION_CANDIDATES", "5"))
+
+# change feed (outbox inventory_events): jeda poll stream SSE saat tidak ada event baru
+EVENT_STREAM_POLL_SECONDS = float(os.getenv("EVENT_STREAM_POLL_SECONDS", "1"))
+EVENT_STREAM_BATCH_SIZE = int(os.getenv("EVENT_STREAM_BATCH_SIZE", "500"))
+# komentar SSE saat idle supaya proxy tidak menutup stream
+EVENT_STREAM_HEARTBEAT_SECONDS = float(os.getenv("EVENT_STREAM_HEARTBEAT_SECONDS", "15"))
+
+
+class AvailabilityCache:
+    """
+    Bounded LRU of per-(SKU, location) availability stats with per-entry TTL.
+    Thread-safe. Entries carry the item version, so a slow read-through miss
+    can never overwrite a newer value written by a mutation.
+    """
+
+    def __init__(self, max_size: int = AVAILABILITY_CACHE_MAX_SIZE, ttl_seconds: float = AVAILABILITY_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, int, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, sku: str, location: str = DEFAULT_LOCATION) -> Optional[dict]:
+        key = (sku, location)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, stats: dict, version: int):
+        key = (stats["sku"], stats.get("location", DEFAULT_LOCATION))
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None and current[1] > version:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, version, stats)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, sku: str, location: str = DEFAULT_LOCATION):
+        with self._lock:
+            if self._entries.pop((sku, location), None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+def _new_item(sku, initial_qty, uom, min_qty, location=DEFAULT_LOCATION):
+    return InventoryItem(
+        id=str(uuid4()),
+        sku=SKU(sku),
+        on_hand=Quantity(initial_qty, uom),
+        reserved=Quantity(0, uom),
+        threshold=Threshold(min_qty),
+        location=location,
+    )
+
+
+def _parse_move_cursor(after):
+    """Move-ledger cursor "<created_at iso>|<seq>" -> (created_at, seq)."""
+    if not after:
+        return None
+    try:
+        created_at, seq = after.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(seq)
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+
+def _next_move_cursor(moves, limit):
+    if len(moves) < limit:
+        return None
+    last = moves[-1]
+    return f"{last.created_at.isoformat()}|{last.seq}"
+
+
+def _apply_reservation_lines(items, lines, ttl_seconds=None):
+    """
+    Apply InventoryItem.reserve for each (sku, order_id, qty) line on the
+    already-loaded `items`. Returns (touched items by sku, one result dict per line).
+    """
+    touched = {}
+    results = []
+    for sku, order_id, qty in lines:
+        result = {"sku": sku, "order_id": order_id, "qty": qty, "reservation_id": None, "error": None}
+        item = items.get(sku)
+        try:
+            if item is None:
+                raise ValueError("Item not found")
+            reservation = item.reserve(order_id, Quantity(qty, item.on_hand.uom), ttl_seconds)
+            result["reservation_id"] = reservation.id
+            touched[sku] = item
+        except ValueError as e:
+            result["error"] = str(e)
+        results.append(result)
+    return touched, results
+
+
+def _batch_outcome(touched, results, all_or_nothing):
+    """
+    Decide a batch before saving: returns (committed, results) when nothing
+    has to be written, or None when `touched` must be saved.
+    """
+    if all_or_nothing and any(r["error"] for r in results):
+        for r in results:
+            r["reservation_id"] = None
+        return False, results
+    if not touched:
+        return not any(r["error"] for r in results), results
+    return None
+
+
+def _remember(cache, item):
+    """Write-through: refresh the cached availability from a just-saved item."""
+    cache.put(_availability(item), item.version)
+
+
+def _remember_row(cache, row):
+    """Cache a repository get_stats() row; returns the stats without version."""
+    version = row.pop("version")
+    cache.put(row, version)
+    return row
+
+
+def _cached_availability_many(cache, skus, location):
+    """Split a (deduplicated, ordered) SKU list into cache hits and misses."""
+    skus = list(dict.fromkeys(skus))
+    found = {}
+    for sku in skus:
+        stats = cache.get(sku, location)
+        if stats is not None:
+            found[sku] = stats
+    return skus, found, [sku for sku in skus if sku not in found]
+
+
+def _merge_availability_rows(cache, skus, found, rows):
+    """Cache repository rows; returns (stats in request order, not-found SKUs)."""
+    for sku, row in rows.items():
+        found[sku] = _remember_row(cache, row)
+    return [found[sku] for sku in skus if sku in found], [sku for sku in skus if sku not in found]
+
+
+def _release_order_lines(items, order_id):
+    """Release `order_id` on every loaded item; returns one dict per released reservation."""
+    released = []
+    for item in items.values():
+        for r in item.release_by_order(order_id):
+            released.append({
+                "sku": item.sku.value,
+                "location": item.location,
+                "reservation_id": r.id,
+                "qty": r.reserved_qty.amount,
+            })
+    return released
+
+
+def _allocation_candidates(cache, rows):
+    """Cache the allocation query rows (they are fresh stats); returns them without version."""
+    return [_remember_row(cache, row) for row in rows]
+
+
+def _backoff_delay(attempt):
+    return random.uniform(0, CONFLICT_BACKOFF_SECONDS * 2 ** attempt)
+
+
+def _availability(item):
+    return {
+        "sku": item.sku.value,
+        "location": item.location,
+        "on_hand": item.on_hand.amount,
+        "reserved": item.reserved.amount,
+        "available": item.available.amount,
+        "uom": item.on_hand.uom,
+        "low_stock": item.is_low_stock(),
+    }
+
+
+class AsyncInventoryService:
+    """
+    Inventory use cases over an async repository (AsyncInventoryRepositoryDB)
+    for `async def` routes: DB waits yield the event loop instead of holding
+    a threadpool worker. InventoryService runs this same implementation over
+    a sync repository.
+    """
+
+    def __init__(self, repo, availability_cache=None, sleep=asyncio.sleep):
         self.repo = repo
+        self.availability_cache = availability_cache if availability_cache is not None else AvailabilityCache()
+        self._sleep = sleep  # dipakai untuk backoff retry conflict
+
+    async def _backoff(self, attempt):
+        await self._sleep(_backoff_delay(attempt))
 
-    def get_item(self, sku: str):
-        item = self.repo.get_by_sku(sku)
+    async def get_item(self, sku: str, location: str = DEFAULT_LOCATION):
+        item = await self.repo.get_by_sku(sku, location=location)
         if not item:
             raise ValueError("Item not found")
         return item
 
-    def create_item(self, sku, initial_qty, uom, min_qty):
-        if self.repo.get_by_sku(sku):
+    async def _mutate(self, sku, operation, lock=False, location=DEFAULT_LOCATION):
+        """
+        Load item, apply `operation(item)`, then save.
+        The whole cycle is retried (with a fresh read, after a jittered
+        backoff) when the repository reports a ConcurrencyConflict; domain
+        ValueErrors are not retried.
+        With lock=True and a repository that supports row locks, the item is
+        loaded with SELECT ... FOR UPDATE and saved in the same transaction.
+        Returns (saved item, operation result).
+        """
+        use_row_lock = lock and getattr(self.repo, "row_lock", "none") != "none"
+        for attempt in range(MAX_CONFLICT_RETRIES):
+            try:
+                timer = stage_timer()
+                if use_row_lock:
+                    async with self.repo.lock_for_update(sku, location=location) as item:
+                        timer.mark("repo_read")
+                        result = operation(item)
+                        timer.mark("domain")
+                else:
+                    item = await self.get_item(sku, location)
+                    timer.mark("repo_read")
+                    result = operation(item)
+                    timer.mark("domain")
+                    item = await self.repo.save(item)
+                timer.mark("repo_save")
+                _remember(self.availability_cache, item)
+                return item, result
+            except ConcurrencyConflict:
+                self.availability_cache.invalidate(sku, location)
+                if attempt == MAX_CONFLICT_RETRIES - 1:
+                    raise
+                await self._backoff(attempt)
+
+    async def create_item(self, sku, initial_qty, uom, min_qty, location=DEFAULT_LOCATION):
+        if await self.repo.get_by_sku(sku, location=location):
             raise ValueError("SKU already exists")
-        item = InventoryItem(
-            id=str(uuid4()),
-            sku=SKU(sku),
-            on_hand=Quantity(initial_qty, uom),
-            reserved=Quantity(0, uom),
-            threshold=Threshold(min_qty),
+        item = await self.repo.save(_new_item(sku, initial_qty, uom, min_qty, location))
+        _remember(self.availability_cache, item)
+        return item
+
+    async def list_items_page(self, after=None, limit=100, sku_prefix=None, low_stock_only=False,
+                              include_reservations=True, location=DEFAULT_LOCATION):
+        """Keyset-paginated listing of one location; returns (items, next_cursor or None)."""
+        items = await self.repo.list_page(
+            after, limit, sku_prefix, low_stock_only, include_reservations, location=location
+        )
+        next_cursor = items[-1].sku.value if len(items) == limit else None
+        return items, next_cursor
+
+    def iter_items(self, after=None, sku_prefix=None, low_stock_only=False, include_reservations=False,
+                   location=DEFAULT_LOCATION):
+        return self.repo.iter_items(after, sku_prefix, low_stock_only, include_reservations, location=location)
+
+    async def list_item_rows_page(self, after=None, limit=100, sku_prefix=None, low_stock_only=False,
+                                  include_reservations=True, location=DEFAULT_LOCATION):
+        """
+        Same page as list_items_page but as raw repository rows for the fast
+        serialization path; returns (item rows, reservation rows, next_cursor).
+        """
+        rows, res_rows = await self.repo.list_page_rows(
+            after, limit, sku_prefix, low_stock_only, include_reservations, location=location
         )
-        return self.repo.save(item)
-
-    def list_items(self):
-        return self.repo.list_all()
-
-    def set_threshold(self, sku, min_qty):
-        item = self.get_item(sku)
-        item.threshold = Threshold(min_qty)
-        return self.repo.save(item)
-
-    def increase_stock(self, sku, qty, reason):
-        item = self.get_item(sku)
-        item.increase(Quantity(qty, item.on_hand.uom), reason)
-        return self.repo.save(item)
-
-    def decrease_stock(self, sku, qty, reason):
-        item = self.get_item(sku)
-        item.decrease(Quantity(qty, item.on_hand.uom), reason)
-        return self.repo.save(item)
-
-    def adjust_stock(self, sku, delta, reason):
-        item = self.get_item(sku)
-        item.adjust(delta, reason)
-        return self.repo.save(item)
-
-    def reserve_stock(self, sku, order_id, qty):
-        item = self.get_item(sku)
-        reservation = item.reserve(order_id, Quantity(qty, item.on_hand.uom))
-        self.repo.save(item)
-        return item, reservation
-
-    def release_reservation(self, sku, res_id):
-        item = self.get_item(sku)
-        item.release(res_id)
-        return self.repo.save(item)
-
-    def get_availability(self, sku):
-        item = self.get_item(sku)
-        return {
-            "sku": sku,
-            "on_hand": item.on_hand.amount,
-            "reserved": item.reserved.amount,
-            "available": item.available.amount,
-            "uom": item.on_hand.uom,
-            "low_stock": item.is_low_stock(),
-        }
-
-    def get_low_stock_items(self):
-        return [i for i in self.list_items() if i.is_low_stock()]
+        next_cursor = rows[-1].sku if len(rows) == limit else None
+        return rows, res_rows, next_cursor
+
+    def iter_item_rows(self, after=None, sku_prefix=None, low_stock_only=False, include_reservations=False,
+                       location=DEFAULT_LOCATION):
+        return self.repo.iter_item_rows(after, sku_prefix, low_stock_only, include_reservations, location=location)
+
+    async def import_items(self, lines, fmt="csv", on_conflict="error", location=DEFAULT_LOCATION,
+                           chunk_size=IMPORT_CHUNK_SIZE):
+        """
+        Bulk create/upsert from CSV or NDJSON lines into one location, chunked
+        executemany upserts instead of one get_by_sku + save per SKU.
+        `lines`: async iterable of decoded lines (see item_import.aiter_lines).
+        Returns an ImportReport.
+        """
+        return await import_lines_async(
+            self.repo, lines, fmt, on_conflict, self.availability_cache, chunk_size, location=location
+        )
+
+    async def list_moves(self, sku, since=None, until=None, after=None, limit=100, location=DEFAULT_LOCATION):
+        """
+        Stock-move ledger for one SKU at one location, keyset paginated.
+        Cursor format: "<created_at iso>|<seq>"; returns (moves, next_cursor or None).
+        """
+        after_key = _parse_move_cursor(after)
+        moves = await self.repo.list_moves(sku, since, until, after_key, limit, location=location)
+        return moves, _next_move_cursor(moves, limit)
+
+    async def get_summary(self, top=10):
+        """Dashboard totals from the incrementally maintained inventory_summary (no SKU scan)."""
+        with stage("repo_read"):
+            return await self.repo.get_summary(top)
+
+    async def list_events(self, after=0, limit=100, sku=None, location=None):
+        """Change feed rows with seq > after; returns (rows, next cursor = last seq or None)."""
+        rows = await self.repo.list_events(after, limit, sku, location)
+        return rows, (rows[-1].seq if rows else None)
+
+    async def follow_events(self, after=0, sku=None, poll_seconds=EVENT_STREAM_POLL_SECONDS, location=None):
+        """
+        Tail the outbox for the SSE stream: yields each non-empty batch after
+        `after`, and an empty list after every idle poll so the caller can
+        send heartbeats / notice a disconnect.
+        """
+        while True:
+            rows = await self.repo.list_events(after, EVENT_STREAM_BATCH_SIZE, sku, location)
+            if rows:
+                after = rows[-1].seq
+                yield rows
+            else:
+                yield rows
+                await asyncio.sleep(poll_seconds)
+
+    async def set_threshold(self, sku, min_qty, location=DEFAULT_LOCATION):
+        def op(item):
+            item.set_threshold(min_qty)
+        return (await self._mutate(sku, op, location=location))[0]
+
+    async def increase_stock(self, sku, qty, reason, location=DEFAULT_LOCATION):
+        return (await self._mutate(
+            sku, lambda item: item.increase(Quantity(qty, item.on_hand.uom), reason), location=location
+        ))[0]
+
+    async def decrease_stock(self, sku, qty, reason, location=DEFAULT_LOCATION):
+        return (await self._mutate(
+            sku, lambda item: item.decrease(Quantity(qty, item.on_hand.uom), reason), lock=True, location=location
+        ))[0]
+
+    async def adjust_stock(self, sku, delta, reason, location=DEFAULT_LOCATION):
+        return (await self._mutate(sku, lambda item: item.adjust(delta, reason), location=location))[0]
+
+    async def reserve_stock(self, sku, order_id, qty, ttl_seconds=None, location=DEFAULT_LOCATION):
+        """
+        ttl_seconds: the reservation expires (and is swept) after this many seconds.
+        No row lock: the save is a guarded increment that only fails when the
+        stock really ran out.
+        """
+        return await self._mutate(
+            sku, lambda item: item.reserve(order_id, Quantity(qty, item.on_hand.uom), ttl_seconds),
+            location=location,
+        )
+
+    async def get_locations(self, sku):
+        """Availability of one SKU at every location, most available first."""
+        with stage("repo_read"):
+            rows = await self.repo.list_locations(sku)
+        return _allocation_candidates(self.availability_cache, rows)
+
+    async def allocate(self, sku, qty, limit=ALLOCATION_CANDIDATES):
+        """
+        Allocation query: locations that can cover `qty` of `sku` in full,
+        best first (most available stock, so picks are not split and the
+        emptiest sites are left alone). Read only; see reserve_allocated.
+        """
+        with stage("repo_read"):
+            rows = await self.repo.list_locations(sku, qty, limit)
+        return _allocation_candidates(self.availability_cache, rows)
+
+    async def reserve_allocated(self, sku, order_id, qty, ttl_seconds=None):
+        """
+        Reserve `qty` at the best location from allocate(). A candidate that
+        ran short between the query and the reserve (another order got there
+        first) is skipped for the next one. Returns (item, reservation).
+        """
+        for candidate in await self.allocate(sku, qty):
+            try:
+                return await self.reserve_stock(sku, order_id, qty, ttl_seconds, location=candidate["location"])
+            except ValueError:
+                continue
+        raise ValueError("No location has enough available stock")
+
+    async def reserve_batch(self, lines, all_or_nothing=True, ttl_seconds=None, location=DEFAULT_LOCATION):
+        """
+        Reserve many (sku, order_id, qty) lines at one location in one go:
+        load all affected items with one query, apply InventoryItem.reserve
+        per line and save everything in one transaction.
+        - all_or_nothing=True: any failing line -> nothing is saved
+        - all_or_nothing=False: failing lines are skipped, the rest is saved
+        Returns (committed, results) with one result dict per line.
+        """
+        for attempt in range(MAX_CONFLICT_RETRIES):
+            timer = stage_timer()
+            items = await self.repo.get_many_by_sku([sku for sku, _, _ in lines], location=location)
+            timer.mark("repo_read")
+            touched, results = _apply_reservation_lines(items, lines, ttl_seconds)
+            outcome = _batch_outcome(touched, results, all_or_nothing)
+            timer.mark("domain")
+            if outcome is not None:
+                return outcome
+
+            try:
+                await self.repo.save_many(list(touched.values()))
+                timer.mark("repo_save")
+            except ConcurrencyConflict:
+                for sku in touched:
+                    self.availability_cache.invalidate(sku, location)
+                if attempt == MAX_CONFLICT_RETRIES - 1:
+                    raise
+                await self._backoff(attempt)
+                continue
+            for item in touched.values():
+                _remember(self.availability_cache, item)
+            return True, results
+
+    async def release_reservation(self, sku, res_id, location=DEFAULT_LOCATION):
+        return (await self._mutate(sku, lambda item: item.release(res_id), location=location))[0]
+
+    async def release_order(self, order_id):
+        """
+        Release every reservation of a (cancelled) order across all SKUs and
+        locations in one transaction. Returns the released reservations;
+        ValueError when the order holds none.
+        """
+        for attempt in range(MAX_CONFLICT_RETRIES):
+            items = await self.repo.get_many_by_order(order_id)
+            if not items:
+                raise ValueError("No reservations for order")
+            released = _release_order_lines(items, order_id)
+            try:
+                await self.repo.save_many(list(items.values()))
+            except ConcurrencyConflict:
+                for item in items.values():
+                    self.availability_cache.invalidate(item.sku.value, item.location)
+                if attempt == MAX_CONFLICT_RETRIES - 1:
+                    raise
+                await self._backoff(attempt)
+                continue
+            for item in items.values():
+                _remember(self.availability_cache, item)
+            return released
+
+    async def get_availability(self, sku, location=DEFAULT_LOCATION):
+        """
+        Read-through cache: a hit costs no DB round trip; a miss reads only
+        the scalar columns of inventory_items (no reservation rows).
+        """
+        stats = self.availability_cache.get(sku, location)
+        if stats is not None:
+            return stats
+        with stage("repo_read"):
+            row = await self.repo.get_stats(sku, location=location)
+        if row is None:
+            raise ValueError("Item not found")
+        return _remember_row(self.availability_cache, row)
+
+    async def get_availability_many(self, skus, location=DEFAULT_LOCATION):
+        """
+        Availability for a whole cart at one location: cache hits first, then
+        every miss in one scalar IN query. Returns (stats list in request
+        order, not-found SKUs).
+        """
+        skus, found, misses = _cached_availability_many(self.availability_cache, skus, location)
+        with stage("repo_read"):
+            rows = await self.repo.get_stats_many(misses, location=location) if misses else {}
+        return _merge_availability_rows(self.availability_cache, skus, found, rows)
+
+    async def get_low_stock_items(self, after=None, limit=100, include_reservations=True, location=DEFAULT_LOCATION):
+        """
+        Low-stock items of one location filtered in the DB (indexed
+        predicate), keyset paginated by SKU.
+        """
+        return await self.repo.list_page(
+            after, limit, low_stock_only=True, include_reservations=include_reservations, location=location
+        )
+
+
+def _run_sync(coro):
+    """
+    Run a service coroutine whose awaits never suspend (every repository
+    call goes to a sync repository), without an event loop.
+    """
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    coro.close()
+    raise RuntimeError("sync service call awaited a real suspension")
+
+
+async def _blocking_sleep(seconds):
+    time.sleep(seconds)
+
+
+async def _aiter(lines):
+    for line in lines:
+        yield line
+
+
+class _SyncRepoAdapter:
+    """Sync repository (InventoryRepositoryDB, fakes) behind the async repository interface."""
+
+    _PASSTHROUGH = ("iter_items", "iter_item_rows")
+
+    def __init__(self, repo):
+        self._repo = repo
+
+    def __getattr__(self, name):
+        attr = getattr(self._repo, name)
+        if not callable(attr) or name in self._PASSTHROUGH:
+            return attr
+
+        async def call(*args, **kwargs):
+            return attr(*args, **kwargs)
+        return call
+
+    @asynccontextmanager
+    async def lock_for_update(self, sku, location=DEFAULT_LOCATION):
+        with self._repo.lock_for_update(sku, location=location) as item:
+            yield item
+
+
+class InventoryService:
+    """
+    Blocking facade over AsyncInventoryService for a sync repository
+    (InventoryRepositoryDB; used by benchmarks and tests). Every use case
+    runs the async implementation, so there is one copy of the domain,
+    retry and cache logic.
+    """
+
+    def __init__(self, repo, availability_cache=None):
+        self.repo = repo
+        self._service = AsyncInventoryService(_SyncRepoAdapter(repo), availability_cache, sleep=_blocking_sleep)
+
+    @property
+    def availability_cache(self):
+        return self._service.availability_cache
+
+    def import_items(self, lines, fmt="csv", on_conflict="error", location=DEFAULT_LOCATION,
+                     chunk_size=IMPORT_CHUNK_SIZE):
+        """`lines`: iterable of decoded lines."""
+        return _run_sync(self._service.import_items(_aiter(lines), fmt, on_conflict, location, chunk_size))
+
+    def __getattr__(self, name):
+        attr = getattr(self._service, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            return _run_sync(attr(*args, **kwargs))
+        return call
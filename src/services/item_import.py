@@ -0,0 +1,213 @@
+"""
+Bulk item import: parse CSV / NDJSON line by line and upsert in chunks.
+
+Memory stays bounded by the chunk size: lines are parsed as they arrive,
+each chunk is one INSERT ... ON CONFLICT executemany transaction (see
+_upsert_items_stmt in src/db.py), and only the first
+IMPORT_MAX_ERROR_SAMPLES row errors are kept (the rest are counted).
+
+Columns / keys: sku, on_hand, uom (default "pcs"), min_qty (default 0).
+Other columns (id, reserved, available, location from an export) are
+ignored, so an export can be imported back as-is. One import targets one
+location (the `location` argument). One record per line: CSV fields with
+embedded newlines are not supported.
+"""
+import csv
+import json
+import os
+import time
+from typing import AsyncIterable, Dict, List, Optional, Tuple
+
+from src.domain.inventory import DEFAULT_LOCATION
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "5000"))
+IMPORT_MAX_ERROR_SAMPLES = int(os.getenv("IMPORT_MAX_ERROR_SAMPLES", "100"))
+IMPORT_FORMATS = ("csv", "ndjson")
+ON_CONFLICT_POLICIES = ("error", "skip", "update")
+
+# (line number, record) - record = {sku, on_hand, uom, min_qty}
+Chunk = List[Tuple[int, dict]]
+
+
+class ImportReport:
+    def __init__(self, fmt: str, on_conflict: str):
+        self.format = fmt
+        self.on_conflict = on_conflict
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+        self.error_count = 0
+        self.errors: List[dict] = []
+        self.chunks = 0
+        self._start = time.perf_counter()
+
+    def add_error(self, line: int, sku: Optional[str], error: str):
+        self.error_count += 1
+        if len(self.errors) < IMPORT_MAX_ERROR_SAMPLES:
+            self.errors.append({"line": line, "sku": sku, "error": error})
+
+    def as_dict(self) -> dict:
+        return {
+            "format": self.format,
+            "on_conflict": self.on_conflict,
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "error_count": self.error_count,
+            "errors": self.errors,
+            "chunks": self.chunks,
+            "duration_seconds": round(time.perf_counter() - self._start, 3),
+        }
+
+
+def _int_field(raw: dict, key: str, default: Optional[int]) -> int:
+    value = raw.get(key)
+    if value is None or value == "":
+        if default is None:
+            raise ValueError(f"{key} is required")
+        return default
+    if isinstance(value, bool):
+        raise ValueError(f"{key} must be an integer")
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be an integer")
+    if number < 0:
+        raise ValueError(f"{key} cannot be negative")
+    return number
+
+
+def _to_record(raw) -> dict:
+    """Raw CSV / JSON object -> record; same rules as CreateItemRequest + domain VOs."""
+    if not isinstance(raw, dict):
+        raise ValueError("Record must be an object")
+    sku = str(raw.get("sku") or "").strip()
+    if not sku:
+        raise ValueError("SKU cannot be empty")
+    uom = str(raw.get("uom") or "").strip() or "pcs"  # kosong / spasi saja -> default
+    return {
+        "sku": sku,
+        "on_hand": _int_field(raw, "on_hand", 0),
+        "uom": uom,
+        "min_qty": _int_field(raw, "min_qty", 0),
+    }
+
+
+class _LineParser:
+    """Feeds decoded lines; CSV takes its column names from the first non-empty line."""
+
+    def __init__(self, fmt: str):
+        if fmt not in IMPORT_FORMATS:
+            raise ValueError(f"Unsupported import format: {fmt}")
+        self.fmt = fmt
+        self.header: Optional[List[str]] = None
+
+    def parse(self, line: str) -> Optional[dict]:
+        """Returns a record, None for blank / header lines; raises ValueError on bad rows."""
+        if not line.strip():
+            return None
+        if self.fmt == "ndjson":
+            try:
+                return _to_record(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON: {e.msg}")
+        fields = next(csv.reader([line]))
+        if self.header is None:
+            header = [name.strip().lower() for name in fields]
+            if "sku" not in header:
+                raise ValueError("CSV header must contain a sku column")
+            self.header = header
+            return None
+        return _to_record(dict(zip(self.header, fields)))
+
+
+def _dedupe_chunk(report: ImportReport, chunk: Chunk) -> Chunk:
+    # satu statement ON CONFLICT tidak boleh menyentuh SKU yang sama dua kali
+    seen = set()
+    unique = []
+    for line, record in chunk:
+        if record["sku"] in seen:
+            report.add_error(line, record["sku"], "Duplicate SKU in the same import chunk")
+            continue
+        seen.add(record["sku"])
+        unique.append((line, record))
+    return unique
+
+
+def _apply_written(report: ImportReport, chunk: Chunk, upserted: Tuple[Dict[str, int], Dict[str, str]],
+                   availability_cache=None, location: str = DEFAULT_LOCATION):
+    """Classify one chunk from upsert_items: ({sku: version} written, {sku: error} rejected updates)."""
+    written, rejected = upserted
+    report.chunks += 1
+    for line, record in chunk:
+        version = written.get(record["sku"])
+        if version == 1:
+            report.inserted += 1
+        elif version is not None:
+            report.updated += 1
+            if availability_cache is not None:
+                availability_cache.invalidate(record["sku"], location)
+        elif report.on_conflict == "skip":
+            report.skipped += 1
+        elif report.on_conflict == "update":
+            error = rejected.get(record["sku"], "on_hand is below the reserved quantity")
+            report.add_error(line, record["sku"], error)
+        else:
+            report.add_error(line, record["sku"], "SKU already exists")
+
+
+def _accept_line(report: ImportReport, parser: _LineParser, line_no: int, line: str, chunk: Chunk):
+    try:
+        record = parser.parse(line)
+    except ValueError as e:
+        if parser.header is None and parser.fmt == "csv":
+            raise  # header rusak: seluruh file tidak bisa dibaca
+        report.rows += 1
+        report.add_error(line_no, None, str(e))
+        return
+    if record is not None:
+        report.rows += 1
+        chunk.append((line_no, record))
+
+
+async def aiter_lines(byte_chunks: AsyncIterable[bytes]):
+    """Request body chunks -> decoded lines (UTF-8, BOM stripped), without buffering the body."""
+    pending = b""
+    first = True
+    async for data in byte_chunks:
+        if first and data:
+            data = data.removeprefix(b"\xef\xbb\xbf")
+            first = False
+        pending += data
+        *complete, pending = pending.split(b"\n")
+        for raw in complete:
+            yield raw.decode("utf-8", errors="replace").rstrip("\r")
+    if pending:
+        yield pending.decode("utf-8", errors="replace").rstrip("\r")
+
+
+async def import_lines_async(repo, lines: AsyncIterable[str], fmt: str, on_conflict: str,
+                             availability_cache=None, chunk_size: int = IMPORT_CHUNK_SIZE,
+                             location: str = DEFAULT_LOCATION) -> ImportReport:
+    """
+    Parse `lines` and upsert chunk by chunk through an async repository
+    (AsyncInventoryRepositoryDB; sync repositories go through InventoryService);
+    updated SKUs are dropped from the availability cache.
+    """
+    report, parser, chunk = ImportReport(fmt, on_conflict), _LineParser(fmt), []
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        _accept_line(report, parser, line_no, line, chunk)
+        if len(chunk) >= chunk_size:
+            chunk = _dedupe_chunk(report, chunk)
+            upserted = await repo.upsert_items([r for _, r in chunk], on_conflict, location)
+            _apply_written(report, chunk, upserted, availability_cache, location)
+            chunk = []
+    if chunk:
+        chunk = _dedupe_chunk(report, chunk)
+        upserted = await repo.upsert_items([r for _, r in chunk], on_conflict, location)
+        _apply_written(report, chunk, upserted, availability_cache, location)
+    return report
@@ -0,0 +1,72 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicWorker:
+    """
+    Base for background jobs that run on the app's event loop every
+    interval_seconds (reservation sweeper, summary reconciler).
+
+    Subclasses implement run_once() and call _record_run() when a run
+    finishes; the base owns the loop, the asyncio task and the counters
+    shared by every worker (runs, errors, last duration / run time).
+    A failed run is logged and counted, and the loop keeps going.
+    """
+
+    name = "periodic_worker"  # label metrics / log
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.runs = 0
+        self.errors = 0
+        self.last_duration_seconds = 0.0
+        self.last_run_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self):
+        raise NotImplementedError
+
+    def _record_run(self, started: float, at: Optional[datetime] = None):
+        """`started` = time.perf_counter() at the start of the run."""
+        self.runs += 1
+        self.last_duration_seconds = time.perf_counter() - started
+        self.last_run_at = at or datetime.utcnow()
+
+    async def run(self):
+        """Run forever every interval_seconds (cancel the task to stop)."""
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                self.errors += 1
+                logger.exception("%s run failed", self.name)
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        """Start the loop on the running event loop; interval 0 = disabled."""
+        if self.interval_seconds > 0 and self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": self.interval_seconds,
+            "runs": self.runs,
+            "errors": self.errors,
+            "last_duration_seconds": self.last_duration_seconds,
+            "last_run_at": self.last_run_at,
+        }
@@ -0,0 +1,79 @@
+import os
+import time
+from datetime import datetime
+from typing import Optional
+
+from src.services.periodic import PeriodicWorker
+
+# interval antar sweep (detik); 0 = sweeper tidak dijalankan
+RESERVATION_SWEEP_INTERVAL_SECONDS = float(os.getenv("RESERVATION_SWEEP_INTERVAL_SECONDS", "5"))
+# reservation per transaksi DELETE ... RETURNING
+RESERVATION_SWEEP_BATCH_SIZE = int(os.getenv("RESERVATION_SWEEP_BATCH_SIZE", "500"))
+
+
+class ReservationSweeper(PeriodicWorker):
+    """
+    Releases expired reservations (expires_at <= now) in batches through an
+    async repository. Each batch deletes the rows and decrements
+    inventory_items.reserved in one transaction; affected SKUs are dropped
+    from the availability cache.
+
+    Metrics (see stats()):
+    - lag: age of the oldest expired reservation when a sweep starts
+    - throughput: reservations released per second in the last sweep
+    """
+
+    name = "reservation_sweeper"
+
+    def __init__(
+        self,
+        repo,
+        availability_cache=None,
+        interval_seconds: float = RESERVATION_SWEEP_INTERVAL_SECONDS,
+        batch_size: int = RESERVATION_SWEEP_BATCH_SIZE,
+    ):
+        super().__init__(interval_seconds)
+        self.repo = repo
+        self.availability_cache = availability_cache
+        self.batch_size = batch_size
+        self.batches = 0
+        self.released_total = 0
+        self.last_released = 0
+        self.last_lag_seconds = 0.0
+
+    async def sweep_once(self, now: Optional[datetime] = None) -> int:
+        """Release everything expired as of `now`; returns the number of reservations released."""
+        now = now or datetime.utcnow()
+        start = time.perf_counter()
+        oldest = await self.repo.oldest_expired_reservation(now)
+        released = 0
+        while oldest is not None:
+            count, by_key = await self.repo.release_expired_reservations(now, self.batch_size)
+            self.batches += 1
+            released += count
+            if self.availability_cache is not None:
+                for sku, location in by_key:
+                    self.availability_cache.invalidate(sku, location)
+            if count < self.batch_size:
+                break
+
+        self.released_total += released
+        self.last_released = released
+        self.last_lag_seconds = (now - oldest).total_seconds() if oldest is not None else 0.0
+        self._record_run(start, now)
+        return released
+
+    async def run_once(self):
+        await self.sweep_once()
+
+    def stats(self) -> dict:
+        duration = self.last_duration_seconds
+        return {
+            **super().stats(),
+            "batch_size": self.batch_size,
+            "batches": self.batches,
+            "released_total": self.released_total,
+            "last_released": self.last_released,
+            "last_throughput_per_second": self.last_released / duration if duration else 0.0,
+            "last_lag_seconds": self.last_lag_seconds,
+        }
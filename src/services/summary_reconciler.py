@@ -0,0 +1,48 @@
+import logging
+import os
+import time
+from typing import Dict
+
+from src.services.periodic import PeriodicWorker
+
+# interval rekonsiliasi penuh inventory_summary (detik); 0 = tidak dijalankan
+SUMMARY_RECONCILE_INTERVAL_SECONDS = float(os.getenv("SUMMARY_RECONCILE_INTERVAL_SECONDS", "600"))
+
+logger = logging.getLogger(__name__)
+
+
+class SummaryReconciler(PeriodicWorker):
+    """
+    Periodically rebuilds inventory_summary from inventory_items through an
+    async repository. The counters are maintained incrementally by every
+    write, so this normally finds no drift; it corrects what incremental
+    maintenance cannot see (rows changed outside the app, the first run
+    after the table is added).
+
+    The first run happens at startup, then every interval_seconds.
+    """
+
+    name = "summary_reconciler"
+
+    def __init__(self, repo, interval_seconds: float = SUMMARY_RECONCILE_INTERVAL_SECONDS):
+        super().__init__(interval_seconds)
+        self.repo = repo
+        self.drift_runs = 0
+        self.last_drift: Dict[str, Dict[str, int]] = {}
+
+    async def reconcile_once(self) -> Dict[str, Dict[str, int]]:
+        """Rebuild the summary; returns the corrected drift {uom: {counter: actual - stored}}."""
+        start = time.perf_counter()
+        drift = await self.repo.reconcile_summary()
+        if drift:
+            self.drift_runs += 1
+            logger.warning("inventory_summary drift corrected: %s", drift)
+        self.last_drift = drift
+        self._record_run(start)
+        return drift
+
+    async def run_once(self):
+        await self.reconcile_once()
+
+    def stats(self) -> dict:
+        return {**super().stats(), "drift_runs": self.drift_runs, "last_drift": self.last_drift}
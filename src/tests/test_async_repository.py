@@ -0,0 +1,250 @@
+"""
+AsyncInventoryRepositoryDB + AsyncInventoryService di atas aiosqlite
+(file SQLite profile WAL) dan asyncpg (kalau TEST_POSTGRES_URL di-set).
+Kontrak sama dengan test_repository_contract.py.
+"""
+import asyncio
+import os
+import time
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.db import Base
+from src.db_async import AsyncInventoryRepositoryDB, create_async_db_engine, to_async_url
+from src.domain.inventory import ConcurrencyConflict, InventoryItem, Quantity, SKU, Threshold
+from src.services.inventory_service import AsyncInventoryService
+from src.services.periodic import PeriodicWorker
+from src.services.reservation_sweeper import ReservationSweeper
+from src.services.summary_reconciler import SummaryReconciler
+
+
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+@pytest.fixture(params=["sqlite-wal-file", "postgresql"])
+def repo(request, tmp_path):
+    # schema dibuat lewat engine sync: fixture tetap sync (tidak butuh event loop)
+    if request.param == "postgresql":
+        if not POSTGRES_URL:
+            pytest.skip("TEST_POSTGRES_URL not set")
+        url = POSTGRES_URL
+    else:
+        url = f"sqlite:///{tmp_path / 'async.db'}"
+    sync_engine = create_engine(url)
+    Base.metadata.drop_all(sync_engine)
+    Base.metadata.create_all(sync_engine)
+
+    if request.param == "postgresql":
+        # tiap test punya event loop sendiri: koneksi asyncpg tidak boleh dipakai ulang lintas loop
+        engine = create_async_engine(to_async_url(url), poolclass=NullPool)
+    else:
+        engine = create_async_db_engine(to_async_url(url), "wal")
+    yield AsyncInventoryRepositoryDB(async_sessionmaker(bind=engine, expire_on_commit=False))
+    # tutup koneksi pool: thread aiosqlite yang masih hidup menahan proses saat exit
+    asyncio.run(engine.dispose())
+    if request.param == "postgresql":
+        Base.metadata.drop_all(sync_engine)
+    sync_engine.dispose()
+
+
+def new_item(sku, on_hand=10, min_qty=1):
+    return InventoryItem(
+        id=f"id-{sku}",
+        sku=SKU(sku),
+        on_hand=Quantity(on_hand),
+        reserved=Quantity(0),
+        threshold=Threshold(min_qty),
+    )
+
+
+def test_to_async_url():
+    assert to_async_url("sqlite:///data/app.db") == "sqlite+aiosqlite:///data/app.db"
+    assert to_async_url("postgresql+psycopg2://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+    with pytest.raises(ValueError):
+        to_async_url("mysql://u:p@h/db")
+
+
+@pytest.mark.asyncio
+async def test_save_get_and_reservation_diff(repo):
+    await repo.save(new_item("A01"))
+    item = await repo.get_by_sku("A01")
+    r1 = item.reserve("ORD1", Quantity(2))
+    item.reserve("ORD2", Quantity(3))
+    await repo.save(item)
+
+    item = await repo.get_by_sku("A01")
+    item.release(r1.id)
+    await repo.save(item)
+
+    loaded = await repo.get_by_sku("A01")
+    assert loaded.reserved.amount == 3
+    assert [r.order_id for r in loaded.reservations] == ["ORD2"]
+    assert await repo.get_by_sku("NOPE") is None
+
+
+@pytest.mark.asyncio
+async def test_stale_write_raises_conflict(repo):
+    await repo.save(new_item("A01"))
+    first = await repo.get_by_sku("A01")
+    second = await repo.get_by_sku("A01")
+
+    first.increase(Quantity(1))
+    await repo.save(first)
+    second.increase(Quantity(1))
+    with pytest.raises(ConcurrencyConflict):
+        await repo.save(second)
+
+
+@pytest.mark.asyncio
+async def test_list_page_iter_items_and_moves(repo):
+    await repo.save_many([new_item("A01"), new_item("A02", on_hand=1, min_qty=5), new_item("B01")])
+
+    page = await repo.list_page(limit=2, sku_prefix="A")
+    assert [i.sku.value for i in page] == ["A01", "A02"]
+    lows = [i.sku.value async for i in repo.iter_items(low_stock_only=True, chunk_size=1)]
+    assert lows == ["A02"]
+
+    item = await repo.get_by_sku("A01")
+    item.increase(Quantity(5), "INBOUND")
+    await repo.save(item)
+    moves = await repo.list_moves("A01")
+    assert [(m.movement_type, m.qty) for m in moves] == [("IN", 5)]
+
+
+@pytest.mark.asyncio
+async def test_lock_for_update(repo):
+    await repo.save(new_item("A01"))
+    repo.row_lock = "wait"
+
+    async with repo.lock_for_update("A01") as item:
+        item.decrease(Quantity(3))
+
+    assert (await repo.get_by_sku("A01")).on_hand.amount == 7
+    with pytest.raises(ValueError, match="Item not found"):
+        async with repo.lock_for_update("NOPE"):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_async_service_reserve_and_batch(repo):
+    service = AsyncInventoryService(repo)
+    await service.create_item("A01", 10, "pcs", 1)
+    await service.create_item("B01", 2, "pcs", 1)
+
+    item, reservation = await service.reserve_stock("A01", "ORD1", 4)
+    assert item.reserved.amount == 4
+
+    committed, results = await service.reserve_batch([("A01", "ORD2", 1), ("B01", "ORD2", 5)])
+    assert committed is False
+    assert results[1]["error"] == "Not enough available stock to reserve"
+    assert (await service.get_availability("A01"))["available"] == 6
+
+    await service.release_reservation("A01", reservation.id)
+    assert (await service.get_availability("A01"))["reserved"] == 0
+
+
+@pytest.mark.asyncio
+async def test_reservation_sweeper_releases_expired(repo):
+    service = AsyncInventoryService(repo)
+    await service.create_item("A01", 10, "pcs", 1)
+    _item, expiring = await service.reserve_stock("A01", "ORD1", 4, ttl_seconds=30)
+    await service.reserve_stock("A01", "ORD2", 1)
+    assert (await service.get_availability("A01"))["available"] == 5
+
+    sweeper = ReservationSweeper(repo, service.availability_cache, batch_size=1)
+    assert await sweeper.sweep_once(expiring.created_at) == 0
+
+    later = expiring.expires_at + timedelta(seconds=10)
+    assert await sweeper.sweep_once(later) == 1
+    stats = sweeper.stats()
+    assert stats["runs"] == 2 and stats["batches"] == 2 and stats["released_total"] == 1
+    assert stats["last_lag_seconds"] == 10
+    # cache di-invalidate: availability langsung terlihat
+    assert (await service.get_availability("A01"))["available"] == 9
+
+
+@pytest.mark.asyncio
+async def test_periodic_worker_counts_errors_and_stops():
+    class Flaky(PeriodicWorker):
+        async def run_once(self):
+            started = time.perf_counter()
+            if self.errors == 0:
+                raise RuntimeError("boom")
+            self._record_run(started)
+
+    worker = Flaky(interval_seconds=0.001)
+    worker.start()
+    while worker.runs < 2:
+        await asyncio.sleep(0.001)
+    await worker.stop()
+
+    stats = worker.stats()
+    assert stats["errors"] == 1 and stats["runs"] >= 2 and stats["last_run_at"] is not None
+    assert worker._task is None
+    idle = Flaky(interval_seconds=0)  # interval 0 = nonaktif
+    idle.start()
+    assert idle._task is None
+
+
+@pytest.mark.asyncio
+async def test_async_service_event_feed(repo):
+    service = AsyncInventoryService(repo)
+    await service.create_item("A01", 10, "pcs", 1)
+    await service.reserve_stock("A01", "ORD1", 2)
+
+    rows, cursor = await service.list_events()
+    assert [r.event_type for r in rows] == ["item.created", "stock.reserved"]
+    assert cursor == rows[-1].seq
+    assert await service.list_events(after=cursor) == ([], None)
+
+    feed = service.follow_events(after=rows[0].seq, poll_seconds=0)
+    assert [r.event_type for r in await feed.__anext__()] == ["stock.reserved"]
+    assert await feed.__anext__() == []  # idle poll
+    await service.set_threshold("A01", 5)
+    assert [r.event_type for r in await feed.__anext__()] == ["threshold.changed"]
+    await feed.aclose()
+
+
+@pytest.mark.asyncio
+async def test_summary_and_reconciler(repo):
+    service = AsyncInventoryService(repo)
+    await service.create_item("A01", 10, "pcs", 1)
+    await service.create_item("B01", 0, "pcs", 2)
+    await service.reserve_stock("A01", "ORD1", 3)
+
+    summary = await service.get_summary(top=5)
+    assert (summary["sku_count"], summary["low_stock_count"]) == (2, 1)
+    assert summary["by_uom"][0]["available"] == 7
+    assert [row["sku"] for row in summary["top_reserved"]] == ["A01"]
+
+    reconciler = SummaryReconciler(repo, interval_seconds=0)
+    assert await reconciler.reconcile_once() == {}
+    stats = reconciler.stats()
+    assert (stats["runs"], stats["drift_runs"], stats["last_drift"]) == (1, 0, {})
+
+
+@pytest.mark.asyncio
+async def test_async_service_locations_and_allocation(repo):
+    service = AsyncInventoryService(repo)
+    await service.create_item("A01", 4, "pcs", 1)
+    await service.create_item("A01", 8, "pcs", 1, location="WH2")
+    with pytest.raises(ValueError):
+        await service.create_item("A01", 1, "pcs", 1, location="WH2")
+
+    assert [row["location"] for row in await service.get_locations("A01")] == ["WH2", "MAIN"]
+    assert [row["location"] for row in await service.allocate("A01", 5)] == ["WH2"]
+
+    item, _res = await service.reserve_allocated("A01", "ORD1", 5)
+    assert (item.location, item.available.amount) == ("WH2", 3)
+    item, _res = await service.reserve_allocated("A01", "ORD2", 4)
+    assert item.location == "MAIN"
+    with pytest.raises(ValueError):
+        await service.reserve_allocated("A01", "ORD3", 4)
+
+    released = await service.release_order("ORD1")
+    assert [(r["sku"], r["location"], r["qty"]) for r in released] == [("A01", "WH2", 5)]
+    assert (await service.get_availability("A01", "WH2"))["available"] == 8
@@ -0,0 +1,267 @@
+import asyncio
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src import auth
+from src.auth import PrincipalCache, User
+from src.db import Base, RevokedTokenModel, UserModel, _rebuild_without_autoincrement, _revocation_lock_stmt
+from src.db_async import create_async_db_engine, to_async_url
+from src.passwords import BCRYPT_ROUNDS, PasswordHasher, PasswordHasherBusy
+from src.revocation import BloomFilter, InMemoryRevocationStore, SQLRevocationStore
+
+
+def make_user(username, role="client"):
+    return User(username=username, full_name=None, role=role, disabled=False)
+
+
+def test_principal_cache_hit_and_invalidate():
+    cache = PrincipalCache(max_size=10, ttl_seconds=60)
+    cache.put(make_user("alice"))
+
+    assert cache.get("alice").username == "alice"
+
+    cache.invalidate("alice")
+    assert cache.get("alice") is None
+
+
+def test_principal_cache_evicts_least_recently_used():
+    cache = PrincipalCache(max_size=2, ttl_seconds=60)
+    cache.put(make_user("a"))
+    cache.put(make_user("b"))
+    cache.get("a")  # a jadi paling baru dipakai
+    cache.put(make_user("c"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_principal_cache_entry_expires():
+    cache = PrincipalCache(max_size=10, ttl_seconds=0)
+    cache.put(make_user("alice"))
+
+    assert cache.get("alice") is None
+
+
+def sqlite_session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000)
+    keys = [f"jti-{i}" for i in range(1000)]
+    for k in keys:
+        bloom.add(k)
+
+    assert all(k in bloom for k in keys)
+    false_positives = sum(f"other-{i}" in bloom for i in range(1000))
+    assert false_positives < 20
+
+
+def test_in_memory_revocation_pruned_at_exp():
+    store = InMemoryRevocationStore()
+    store.revoke("live", datetime.utcnow() + timedelta(minutes=5))
+    store.revoke("expired", datetime.utcnow() - timedelta(seconds=1))
+
+    assert store.is_revoked("live")
+    assert not store.is_revoked("expired")
+    assert len(store) == 1
+
+
+def test_sql_revocation_visible_to_other_worker():
+    factory = sqlite_session_factory()
+    worker_a = SQLRevocationStore(factory, sync_seconds=0)
+    worker_b = SQLRevocationStore(factory, sync_seconds=0)
+
+    assert not worker_b.is_revoked("jti-1")
+    worker_a.revoke("jti-1", datetime.utcnow() + timedelta(minutes=5))
+
+    assert worker_a.is_revoked("jti-1")
+    assert worker_b.is_revoked("jti-1")
+
+
+def test_sql_revocation_seq_not_reused_after_prune():
+    factory = sqlite_session_factory()
+    worker_a = SQLRevocationStore(factory, sync_seconds=0, prune_seconds=0)
+    worker_b = SQLRevocationStore(factory, sync_seconds=0)
+    worker_a.revoke("old-1", datetime.utcnow() - timedelta(seconds=1))
+    worker_a.revoke("old-2", datetime.utcnow() - timedelta(seconds=1))
+    assert not worker_b.is_revoked("old-2")  # cursor B sekarang di seq 2
+
+    assert not worker_a.is_revoked("old-2")  # prune menghapus seq 1-2
+    worker_a.revoke("victim", datetime.utcnow() + timedelta(minutes=5))
+
+    assert worker_b.is_revoked("victim")
+
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set")
+def test_postgres_revocations_commit_in_seq_order():
+    engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    reader = SQLRevocationStore(factory, sync_seconds=0)
+    expires_at = datetime.utcnow() + timedelta(minutes=5)
+    try:
+        # revoke yang insert duluan tapi commit belakangan
+        with factory() as slow:
+            slow.execute(_revocation_lock_stmt("postgresql"))
+            slow.add(RevokedTokenModel(jti="slow", expires_at=expires_at))
+            slow.flush()
+            fast = threading.Thread(target=SQLRevocationStore(factory).revoke, args=("fast", expires_at))
+            fast.start()
+            fast.join(0.5)
+            assert fast.is_alive()  # antre di lock, belum dapat seq
+            assert not reader.is_revoked("fast")
+            slow.commit()
+        fast.join(5)
+
+        # tanpa lock, sync di atas sudah lewat seq "fast" dan "slow" tidak pernah terlihat
+        assert reader.is_revoked("slow")
+        assert reader.is_revoked("fast")
+        with factory() as db:
+            seqs = dict(db.execute(select(RevokedTokenModel.jti, RevokedTokenModel.seq)).all())
+        assert seqs["slow"] < seqs["fast"]
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+    assert _revocation_lock_stmt("sqlite") is None
+
+
+def test_sqlite_revoked_tokens_rebuilt_with_autoincrement():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE revoked_tokens (seq INTEGER PRIMARY KEY, jti VARCHAR UNIQUE NOT NULL, "
+            "expires_at DATETIME NOT NULL)"
+        ))
+        conn.execute(text("INSERT INTO revoked_tokens VALUES (7, 'jti-7', '2099-01-01 00:00:00')"))
+        _rebuild_without_autoincrement(conn, RevokedTokenModel.__table__)
+        ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'revoked_tokens'")).scalar()
+        rows = conn.execute(text("SELECT seq, jti FROM revoked_tokens")).all()
+
+    assert "AUTOINCREMENT" in ddl
+    assert rows == [(7, "jti-7")]
+
+
+def test_sql_revocation_prunes_expired_rows():
+    factory = sqlite_session_factory()
+    store = SQLRevocationStore(factory, sync_seconds=0, prune_seconds=0)
+    store.revoke("old", datetime.utcnow() - timedelta(seconds=1))
+    store.revoke("new", datetime.utcnow() + timedelta(minutes=5))
+
+    assert not store.is_revoked("old")
+    assert store.is_revoked("new")
+    with factory() as db:
+        assert db.query(RevokedTokenModel).count() == 1
+
+
+def test_principal_change_broadcast_to_other_worker():
+    factory = sqlite_session_factory()
+    worker_a = SQLRevocationStore(factory, sync_seconds=0)
+    worker_b = SQLRevocationStore(factory, sync_seconds=0)
+    cache_b = PrincipalCache(ttl_seconds=60)
+    worker_b.on_principal_change = cache_b.invalidate
+    cache_b.put(make_user("alice"))
+    cache_b.put(make_user("bob:ops"))
+
+    worker_a.publish_principal_change("bob:ops", ttl_seconds=60)
+    assert cache_b.get("bob:ops") is not None  # belum sync
+    worker_b.is_revoked("any-jti")
+
+    assert cache_b.get("bob:ops") is None
+    assert cache_b.get("alice") is not None
+    assert not worker_b.is_revoked("principal:bob:ops")
+
+
+@pytest.mark.asyncio
+async def test_disabled_user_rejected_on_other_worker(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'auth.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        db.add(UserModel(username="bob", role="admin", disabled=False, hashed_password="x"))
+        db.commit()
+    async_engine = create_async_db_engine(to_async_url(url))
+
+    # worker ini (B): cache + store modul auth; worker A = store lain di DB yang sama
+    store_b = SQLRevocationStore(factory, sync_seconds=0)
+    cache_b = PrincipalCache(ttl_seconds=60)
+    store_b.on_principal_change = cache_b.invalidate
+    monkeypatch.setattr(auth, "revocation_store", store_b)
+    monkeypatch.setattr(auth, "principal_cache", cache_b)
+    monkeypatch.setattr(auth, "AsyncReadSessionLocal", async_sessionmaker(async_engine, expire_on_commit=False))
+    worker_a = SQLRevocationStore(factory, sync_seconds=0)
+
+    token = auth.create_access_token({"sub": "bob", "role": "admin"})
+    try:
+        assert (await auth.get_current_user(token)).username == "bob"
+        assert cache_b.get("bob") is not None
+
+        with factory() as db:
+            db.query(UserModel).filter(UserModel.username == "bob").update({"disabled": True})
+            db.commit()
+        worker_a.publish_principal_change("bob", cache_b.ttl_seconds)
+
+        with pytest.raises(HTTPException) as exc:
+            await auth.get_current_user(token)
+        assert exc.value.status_code == 401
+    finally:
+        await async_engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_rejects_when_queue_full():
+    hasher = PasswordHasher(workers=0, max_pending=1)
+    results = await asyncio.gather(hasher.hash("pw"), hasher.hash("pw"), return_exceptions=True)
+
+    assert sum(isinstance(r, PasswordHasherBusy) for r in results) == 1
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.stats()["pending"] == 0
+    assert hasher.stats()["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_counts_failures_separately():
+    hasher = PasswordHasher(workers=0)
+    with pytest.raises(ValueError):
+        await hasher.verify_and_update("pw", "not-a-hash")
+    await hasher.hash("pw")
+
+    stats = hasher.stats()
+    assert (stats["completed"], stats["failed"], stats["pending"]) == (1, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_upgrades_low_cost_hash():
+    hasher = PasswordHasher(workers=0)
+    weak = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("pw")
+
+    assert await hasher.verify_and_update("bad", weak) == (False, None)
+    valid, new_hash = await hasher.verify_and_update("pw", weak)
+    assert valid and new_hash.startswith(f"$2b${BCRYPT_ROUNDS:02d}$")
+    assert await hasher.verify_and_update("pw", new_hash) == (True, None)
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_process_pool():
+    hasher = PasswordHasher(workers=1)
+    try:
+        hashed = await hasher.hash("pw")
+        assert (await hasher.verify_and_update("pw", hashed))[0]
+    finally:
+        hasher.shutdown()
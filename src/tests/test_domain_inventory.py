@@ -1,5 +1,5 @@
 import pytest
-from src.domain.inventory import SKU, Quantity, Threshold, InventoryItem
+from src.domain.inventory import SKU, Quantity, Threshold, InventoryItem, ReservationBook
 
 def test_sku_not_empty():
     with pytest.raises(ValueError):
@@ -162,3 +162,146 @@ def test_invariant_reserved_negative():
 
     with pytest.raises(ValueError, match="Reserved cannot be negative"):
         item._ensure_invariants()
+
+
+def test_reservation_changes_tracked_since_load():
+    item = InventoryItem("1", SKU("A01"), Quantity(10), Quantity(0), Threshold(1))
+    r1 = item.reserve("ORD1", Quantity(2))
+    r2 = item.reserve("ORD2", Quantity(3))
+
+    added, removed = item.pending_reservation_changes()
+    assert {r.id for r in added} == {r1.id, r2.id}
+    assert removed == []
+
+    item.mark_persisted()
+    item.release(r1.id)
+    r3 = item.reserve("ORD3", Quantity(1))
+
+    added, removed = item.pending_reservation_changes()
+    assert [r.id for r in added] == [r3.id]
+    assert removed == [r1.id]
+
+
+def test_release_of_unpersisted_reservation_leaves_no_diff():
+    item = InventoryItem("1", SKU("A01"), Quantity(10), Quantity(0), Threshold(1))
+    res = item.reserve("ORD1", Quantity(2))
+    item.release(res.id)
+
+    assert item.pending_reservation_changes() == ([], [])
+
+
+def test_pending_reserve_delta_only_for_pure_reservations():
+    item = InventoryItem("1", SKU("A01"), Quantity(10), Quantity(0), Threshold(1))
+    assert item.pending_reserve_delta() is None  # never persisted
+
+    item.mark_persisted()
+    item.reserve("ORD1", Quantity(2))
+    item.reserve("ORD2", Quantity(3))
+    assert item.pending_reserve_delta() == 5
+
+    item.increase(Quantity(1))
+    assert item.pending_reserve_delta() is None
+
+
+def test_pending_moves_cleared_after_persist():
+    item = InventoryItem("1", SKU("A01"), Quantity(10), Quantity(0), Threshold(1))
+    item.increase(Quantity(5), "INBOUND")
+    assert [m.movement_type for m in item.pending_moves()] == ["IN"]
+
+    item.mark_persisted()
+    assert item.pending_moves() == []
+
+    item.adjust(-2, "ADJ")
+    assert [m.movement_type for m in item.pending_moves()] == ["ADJUST"]
+    assert len(item.moves) == 2
+
+
+def test_value_objects_are_slotted():
+    for obj in (SKU("A01"), Quantity(1), Threshold(1)):
+        assert not hasattr(obj, "__dict__")
+    item = InventoryItem("1", SKU("A01"), Quantity(10), Quantity(0), Threshold(3))
+    assert not hasattr(item, "__dict__")
+    assert not hasattr(item.reserve("ORD1", Quantity(1)), "__dict__")
+
+
+def test_quantity_of_is_interned_and_validated():
+    assert Quantity.of(5, "pcs") is Quantity.of(5, "pcs")
+    assert Quantity.of(5, "pcs") == Quantity(5, "pcs")
+    assert Quantity(5) is not Quantity(5)  # constructor tetap instance baru
+    with pytest.raises(ValueError):
+        Quantity.of(-1)
+
+
+def test_available_reused_until_stock_changes():
+    item = InventoryItem("1", SKU("A01"), Quantity(10), Quantity(0), Threshold(3))
+    first = item.available
+    assert item.available is first
+    assert item.available_amount == 10
+
+    item.reserve("ORD1", Quantity(4))
+    assert item.available is not first
+    assert item.available == Quantity(6)
+    assert item.available_amount == 6
+
+
+def test_release_by_order_frees_all_order_reservations():
+    item = InventoryItem("1", SKU("A01"), Quantity(20), Quantity(0), Threshold(1))
+    item.mark_persisted()
+    keep = item.reserve("ORD1", Quantity(2))
+    item.reserve("ORD2", Quantity(3))
+    item.reserve("ORD2", Quantity(4))
+    item.mark_persisted()
+
+    released = item.release_by_order("ORD2")
+    assert sorted(r.reserved_qty.amount for r in released) == [3, 4]
+    assert item.reserved.amount == 2
+    assert [r.id for r in item.reservations] == [keep.id]
+    assert item.reservations.for_order("ORD2") == []
+    assert sorted(item.pending_reservation_changes()[1]) == sorted(r.id for r in released)
+    with pytest.raises(ValueError, match="No reservations for order"):
+        item.release_by_order("ORD2")
+
+
+def test_reservation_book_indexes_by_id_and_order():
+    item = InventoryItem("1", SKU("A01"), Quantity(10), Quantity(0), Threshold(1))
+    r1 = item.reserve("ORD1", Quantity(1))
+    r2 = item.reserve("ORD1", Quantity(1))
+
+    assert r1.id in item.reservations
+    assert item.reservations.get(r2.id) is r2
+    item.release(r1.id)
+    assert item.reservations.for_order("ORD1") == [r2]
+    assert len(item.reservations) == 1
+    assert list(item.reservations) == [r2]
+    assert item.reservations == ReservationBook([r2])
+    assert item.reservations != [r2]  # hanya sebanding dengan ReservationBook
+
+
+def test_reserve_with_ttl_sets_expiry():
+    item = InventoryItem(id="1", sku=SKU("A01"), on_hand=Quantity(10), reserved=Quantity(0), threshold=Threshold(1))
+    forever = item.reserve("ORD1", Quantity(1))
+    expiring = item.reserve("ORD2", Quantity(1), ttl_seconds=30)
+    assert forever.expires_at is None
+    assert (expiring.expires_at - expiring.created_at).total_seconds() == 30
+
+
+def test_events_recorded_per_mutation_and_cleared_on_persist():
+    item = InventoryItem("1", SKU("A01"), Quantity(10), Quantity(0), Threshold(1))
+    assert [e.event_type for e in item.pending_events()] == ["item.created"]
+
+    item.mark_persisted()
+    item.increase(Quantity(5), "PO-1")
+    res = item.reserve("ORD1", Quantity(2))
+    item.release(res.id)
+    item.adjust(-3)
+    item.set_threshold(4)
+
+    events = item.pending_events()
+    assert [e.event_type for e in events] == [
+        "stock.increased", "stock.reserved", "reservation.released", "stock.adjusted", "threshold.changed",
+    ]
+    assert events[0].data == {"move_id": item.moves[0].id, "reason": "PO-1", "qty": 5}
+    assert events[2].data == {"reservation_id": res.id, "order_id": "ORD1", "qty": 2}
+
+    item.mark_persisted()
+    assert item.pending_events() == []
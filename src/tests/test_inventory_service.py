@@ -1,22 +1,75 @@
+import asyncio
+import copy
+from contextlib import contextmanager
+
 import pytest
-from src.services.inventory_service import InventoryService
-from src.domain.inventory import InventoryItem, SKU, Quantity, Threshold
+from src.services import inventory_service
+from src.services.inventory_service import AvailabilityCache, InventoryService, MAX_CONFLICT_RETRIES, _run_sync
+from src.domain.inventory import DEFAULT_LOCATION, InventoryItem, SKU, Quantity, Threshold, ConcurrencyConflict
 from uuid import uuid4
 
 class FakeRepo:
     def __init__(self):
         self.items = {}
+        self.stats_reads = 0
+        self.stats_batches = 0
 
-    def get_by_sku(self, sku):
-        return self.items.get(sku)
+    def get_by_sku(self, sku, location=DEFAULT_LOCATION):
+        return self.items.get((sku, location))
 
     def save(self, item):
-        self.items[item.sku.value] = item
+        self.items[(item.sku.value, item.location)] = item
         return item
 
     def list_all(self):
         return list(self.items.values())
 
+    def get_many_by_sku(self, skus, location=DEFAULT_LOCATION):
+        return {sku: self.items[(sku, location)] for sku in skus if (sku, location) in self.items}
+
+    def save_many(self, items):
+        return [self.save(i) for i in items]
+
+    def get_many_by_order(self, order_id):
+        return {
+            key: item for key, item in self.items.items()
+            if item.reservations.for_order(order_id)
+        }
+
+    def get_stats(self, sku, location=DEFAULT_LOCATION):
+        self.stats_reads += 1
+        item = self.items.get((sku, location))
+        if item is None:
+            return None
+        return {
+            "sku": sku,
+            "location": location,
+            "on_hand": item.on_hand.amount,
+            "reserved": item.reserved.amount,
+            "available": item.available.amount,
+            "uom": item.on_hand.uom,
+            "low_stock": item.is_low_stock(),
+            "version": item.version,
+        }
+
+    def get_stats_many(self, skus, location=DEFAULT_LOCATION):
+        self.stats_batches += 1
+        rows = {sku: self.get_stats(sku, location) for sku in skus}
+        return {sku: row for sku, row in rows.items() if row is not None}
+
+    def list_locations(self, sku, min_available=0, limit=100):
+        rows = [self.get_stats(s, location) for s, location in self.items if s == sku]
+        rows = [r for r in rows if r["available"] >= min_available]
+        return sorted(rows, key=lambda r: (-r["available"], r["location"]))[:limit]
+
+    def list_page(self, after_sku=None, limit=100, sku_prefix=None, low_stock_only=False, include_reservations=True,
+                  location=DEFAULT_LOCATION):
+        items = sorted((i for i in self.items.values() if i.location == location), key=lambda i: i.sku.value)
+        items = [i for i in items if after_sku is None or i.sku.value > after_sku]
+        items = [i for i in items if not sku_prefix or i.sku.value.startswith(sku_prefix)]
+        items = [i for i in items if not low_stock_only or i.is_low_stock()]
+        return items[:limit]
+
 
 @pytest.fixture
 def repo():
@@ -119,6 +172,17 @@ def test_get_low_stock_items(service):
     assert lows[0].sku.value == "A01"
 
 
+def test_get_low_stock_items_pages_by_sku(service):
+    for sku in ("C01", "A01", "B01"):
+        service.create_item(sku, 1, "pcs", 5)
+    service.create_item("D01", 10, "pcs", 5)
+
+    first = service.get_low_stock_items(limit=2)
+    assert [i.sku.value for i in first] == ["A01", "B01"]
+    rest = service.get_low_stock_items(after=first[-1].sku.value, limit=2)
+    assert [i.sku.value for i in rest] == ["C01"]
+
+
 def test_reserve_fail(service):
     service.create_item("A01", 3, "pcs", 1)
     with pytest.raises(ValueError):
@@ -235,3 +299,229 @@ def test_release_reservation_not_found(repo):
         service.release_reservation("A01", "INVALID-ID")
 
 
+
+
+class ConflictingRepo(FakeRepo):
+    """FakeRepo yang gagal save N kali pertama (simulasi concurrent writer)."""
+
+    def __init__(self, conflicts):
+        super().__init__()
+        self.conflicts = conflicts
+        self.save_calls = 0
+
+    def get_by_sku(self, sku, location=DEFAULT_LOCATION):
+        # seperti DB asli: tiap load dapat object baru
+        item = super().get_by_sku(sku, location)
+        return copy.deepcopy(item) if item else None
+
+    def save(self, item):
+        self.save_calls += 1
+        if (item.sku.value, item.location) in self.items and self.conflicts > 0:
+            self.conflicts -= 1
+            raise ConcurrencyConflict("conflict")
+        return super().save(item)
+
+
+def test_reserve_retries_on_conflict():
+    repo = ConflictingRepo(conflicts=1)
+    service = InventoryService(repo)
+    service.create_item("A01", 10, "pcs", 1)
+
+    item, res = service.reserve_stock("A01", "ORD1", 3)
+
+    assert item.reserved.amount == 3
+    assert res.order_id == "ORD1"
+    assert repo.save_calls == 3  # create + conflict + retry
+
+
+def test_conflict_raised_after_max_retries(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(inventory_service.time, "sleep", sleeps.append)
+    repo = ConflictingRepo(conflicts=MAX_CONFLICT_RETRIES)
+    service = InventoryService(repo)
+    service.create_item("A01", 10, "pcs", 1)
+
+    with pytest.raises(ConcurrencyConflict):
+        service.decrease_stock("A01", 1, "CONSUME")
+
+    # jittered backoff di antara percobaan, tidak setelah yang terakhir
+    assert len(sleeps) == MAX_CONFLICT_RETRIES - 1
+    for attempt, delay in enumerate(sleeps):
+        assert 0 <= delay <= inventory_service.CONFLICT_BACKOFF_SECONDS * 2 ** attempt
+
+
+def test_reserve_batch_all_or_nothing_rejects_whole_batch(service):
+    service.create_item("A01", 10, "pcs", 1)
+    service.create_item("B01", 2, "pcs", 1)
+
+    committed, results = service.reserve_batch([("A01", "ORD1", 3), ("B01", "ORD1", 5)])
+
+    assert committed is False
+    assert results[1]["error"] == "Not enough available stock to reserve"
+    assert all(r["reservation_id"] is None for r in results)
+
+
+def test_reserve_batch_best_effort_saves_valid_lines(service, repo):
+    service.create_item("A01", 10, "pcs", 1)
+    service.create_item("B01", 2, "pcs", 1)
+
+    committed, results = service.reserve_batch(
+        [("A01", "ORD1", 3), ("B01", "ORD1", 5), ("NOPE", "ORD1", 1)],
+        all_or_nothing=False,
+    )
+
+    assert committed is True
+    assert results[0]["reservation_id"] is not None
+    assert results[2]["error"] == "Item not found"
+    assert repo.get_by_sku("A01").reserved.amount == 3
+    assert repo.get_by_sku("B01").reserved.amount == 0
+
+
+def test_list_items_page_keyset_cursor(service):
+    for sku in ("A01", "A02", "A03", "B01"):
+        service.create_item(sku, 10, "pcs", 1)
+
+    page1, cursor = service.list_items_page(limit=2, sku_prefix="A")
+    assert [i.sku.value for i in page1] == ["A01", "A02"]
+    assert cursor == "A02"
+
+    page2, cursor = service.list_items_page(after=cursor, limit=2, sku_prefix="A")
+    assert [i.sku.value for i in page2] == ["A03"]
+    assert cursor is None
+
+
+def test_list_moves_rejects_bad_cursor(service):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        service.list_moves("A01", after="not-a-cursor")
+
+
+class LockingRepo(FakeRepo):
+    """FakeRepo dengan unit of work lock_for_update (seperti PostgreSQL)."""
+
+    row_lock = "wait"
+
+    def __init__(self):
+        super().__init__()
+        self.locked = []
+
+    @contextmanager
+    def lock_for_update(self, sku, location=DEFAULT_LOCATION):
+        self.locked.append(sku)
+        item = self.get_by_sku(sku, location)
+        if item is None:
+            raise ValueError("Item not found")
+        yield item
+        self.save(item)
+
+
+def test_only_decrease_uses_row_lock_when_supported():
+    repo = LockingRepo()
+    service = InventoryService(repo)
+    service.create_item("A01", 10, "pcs", 1)
+
+    service.reserve_stock("A01", "ORD1", 2)  # guarded increment, tanpa lock
+    service.decrease_stock("A01", 3, "CONSUME")
+    service.increase_stock("A01", 1, "INBOUND")
+
+    assert repo.locked == ["A01"]
+    assert repo.get_by_sku("A01").on_hand.amount == 8
+
+
+def test_availability_read_through_and_write_update(repo, service):
+    service.create_item("A01", 10, "pcs", 2)
+    service.availability_cache.clear()
+
+    assert service.get_availability("A01")["available"] == 10  # miss -> scalar read
+    assert service.get_availability("A01")["available"] == 10  # hit
+    assert repo.stats_reads == 1
+
+    service.reserve_stock("A01", "ORD1", 4)
+    assert service.get_availability("A01")["available"] == 6  # updated on write
+    assert repo.stats_reads == 1
+
+    stats = service.availability_cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    with pytest.raises(ValueError):
+        service.get_availability("NOPE")
+
+
+def test_availability_cache_evicts_lru_and_ignores_stale_versions():
+    cache = AvailabilityCache(max_size=2, ttl_seconds=60)
+    cache.put({"sku": "A"}, 1)
+    cache.put({"sku": "B"}, 1)
+    cache.get("A")
+    cache.put({"sku": "C"}, 1)
+    assert cache.get("B") is None
+    assert cache.stats()["evictions"] == 1
+
+    cache.put({"sku": "A", "available": 5}, 3)
+    cache.put({"sku": "A", "available": 9}, 2)  # older read-through result
+    assert cache.get("A")["available"] == 5
+
+
+def test_availability_many_uses_cache_then_one_batch_read(repo, service):
+    for sku in ("A01", "B01", "C01"):
+        service.create_item(sku, 10, "pcs", 1)
+    service.availability_cache.clear()
+    service.get_availability("B01")
+
+    items, not_found = service.get_availability_many(["C01", "B01", "NOPE", "A01", "C01"])
+    assert [s["sku"] for s in items] == ["C01", "B01", "A01"]
+    assert not_found == ["NOPE"]
+    assert repo.stats_batches == 1
+
+
+def test_release_order_across_skus(service):
+    service.create_item("A01", 10, "pcs", 1)
+    service.create_item("B01", 10, "pcs", 1)
+    service.reserve_stock("A01", "ORD1", 2)
+    service.reserve_stock("B01", "ORD1", 3)
+    service.reserve_stock("B01", "ORD2", 1)
+
+    released = service.release_order("ORD1")
+    assert sorted((r["sku"], r["qty"]) for r in released) == [("A01", 2), ("B01", 3)]
+    assert service.get_availability("B01")["reserved"] == 1
+    with pytest.raises(ValueError):
+        service.release_order("ORD1")
+
+
+def test_locations_are_separate_stock(service):
+    service.create_item("A01", 10, "pcs", 1)
+    service.create_item("A01", 4, "pcs", 1, location="WH2")
+    with pytest.raises(ValueError):
+        service.create_item("A01", 1, "pcs", 1, location="WH2")
+
+    service.reserve_stock("A01", "ORD1", 3, location="WH2")
+    assert service.get_availability("A01")["available"] == 10
+    assert service.get_availability("A01", "WH2")["available"] == 1
+    assert [r["location"] for r in service.get_locations("A01")] == [DEFAULT_LOCATION, "WH2"]
+
+
+def test_reserve_allocated_picks_best_location_and_skips_short_ones(service, repo, monkeypatch):
+    service.create_item("A01", 5, "pcs", 0, location="WH1")
+    service.create_item("A01", 8, "pcs", 0, location="WH2")
+    service.create_item("A01", 2, "pcs", 0, location="WH3")
+
+    assert [c["location"] for c in service.allocate("A01", 4)] == ["WH2", "WH1"]
+    item, _reservation = service.reserve_allocated("A01", "ORD1", 4)
+    assert item.location == "WH2"
+
+    # WH1 ranked first, then drained by another order before the reserve
+    stale = repo.list_locations("A01", 3, 5)
+    assert [c["location"] for c in stale] == ["WH1", "WH2"]
+    service.reserve_stock("A01", "OTHER", 3, location="WH1")
+    monkeypatch.setattr(repo, "list_locations", lambda *args: [dict(row) for row in stale])
+    item, _reservation = service.reserve_allocated("A01", "ORD2", 3)
+    assert item.location == "WH2"
+
+    monkeypatch.undo()
+    with pytest.raises(ValueError):
+        service.reserve_allocated("A01", "ORD3", 6)
+
+
+def test_sync_facade_refuses_a_suspending_call():
+    async def suspends():
+        await asyncio.sleep(0)
+
+    with pytest.raises(RuntimeError):
+        _run_sync(suspends())
@@ -0,0 +1,66 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from src.metrics import (
+    DB_QUERIES,
+    HTTP_REQUESTS,
+    STAGE_LATENCY,
+    Histogram,
+    MetricsMiddleware,
+    Registry,
+    instrument_engine,
+    stage,
+    stage_timer,
+)
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("t_seconds", "test", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, "/a")
+
+    lines = histogram.render()
+    assert 't_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 't_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 't_seconds_count{route="/a"} 3' in lines
+
+
+def test_registry_renders_collectors():
+    registry = Registry()
+    registry.register_collector(lambda: [("t_ratio", "gauge", "test", [({"cache": "x"}, 0.5)])])
+    assert 't_ratio{cache="x"} 0.5' in registry.render()
+
+
+def test_stages_outside_request_are_noop():
+    with stage("domain"):
+        pass
+    stage_timer().mark("repo_save")
+
+
+def test_middleware_records_route_template_stages_and_queries():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics-test/{sku}")
+    def endpoint(sku: str):
+        timer = stage_timer()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        timer.mark("repo_read")
+        with stage("serialization"):
+            return {"sku": sku}
+
+    client = TestClient(app)
+    assert client.get("/metrics-test/A01").status_code == 200
+    client.get("/metrics-test/B02")
+
+    route = "/metrics-test/{sku}"
+    assert HTTP_REQUESTS._values[("GET", route, "200")] == 2
+    counts, total = DB_QUERIES._values[(route,)]
+    assert sum(counts) == 2 and total == 4
+    assert {name for r, name in STAGE_LATENCY._values if r == route} == {"repo_read", "serialization"}
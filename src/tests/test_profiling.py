@@ -0,0 +1,62 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from src.profiling import (
+    N_PLUS_ONE_THRESHOLD,
+    ProfilingMiddleware,
+    QueryProfile,
+    SlowRequestLog,
+    instrument_engine,
+    note_principal,
+)
+
+
+def _profile(duration):
+    profile = QueryProfile("GET", "/x")
+    profile.duration = duration
+    return profile
+
+
+def test_slow_request_log_keeps_slowest():
+    log = SlowRequestLog(size=2)
+    for duration in (0.3, 0.1, 0.5, 0.2):
+        log.offer(_profile(duration), "/x")
+    assert [entry["duration_ms"] for entry in log.slowest()] == [500.0, 300.0]
+    assert len(log.slowest(limit=1)) == 1
+
+
+def test_repeated_select_flagged_as_n_plus_one():
+    profile = QueryProfile("GET", "/x")
+    for _ in range(N_PLUS_ONE_THRESHOLD):
+        profile.record("SELECT * FROM reservations WHERE sku = ?", 0.001, False)
+    profile.record("SELECT * FROM inventory_items", 0.001, False)
+    assert profile.n_plus_one() == [
+        {"statement": "SELECT * FROM reservations WHERE sku = ?", "count": N_PLUS_ONE_THRESHOLD}
+    ]
+
+
+def test_middleware_profiles_only_admin_requests_with_header():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    log = SlowRequestLog(size=10)
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, slow_log=log)
+
+    @app.get("/profile-test/{role}")
+    def endpoint(role: str):
+        note_principal(role)
+        with engine.connect() as conn:
+            for n in range(3):
+                conn.execute(text("SELECT :n"), {"n": n})
+        return {}
+
+    client = TestClient(app)
+    assert "x-query-count" not in client.get("/profile-test/admin").headers
+    assert "x-query-count" not in client.get("/profile-test/client", headers={"X-Query-Profile": "1"}).headers
+    response = client.get("/profile-test/admin", headers={"X-Query-Profile": "1"})
+    assert response.headers["x-query-count"] == "3"
+
+    [entry] = log.slowest()
+    assert entry["route"] == "/profile-test/{role}"
+    assert [q["statement"] for q in entry["queries"]] == ["SELECT ?"] * 3
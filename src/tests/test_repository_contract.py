@@ -0,0 +1,441 @@
+"""
+Contract InventoryRepositoryDB yang harus sama di semua backend.
+
+Backend default: SQLite in-memory dan SQLite file (profile WAL + reader
+terpisah). Set TEST_POSTGRES_URL (mis. postgresql+psycopg2://u:p@localhost/wms_test)
+untuk menjalankan contract yang sama terhadap PostgreSQL.
+"""
+import os
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.db import Base, InventoryRepositoryDB, _outbox_lock_stmt, _select_items_page, create_db_engine
+from src.domain.inventory import ConcurrencyConflict, InventoryItem, Quantity, SKU, Threshold
+from src.services.inventory_service import InventoryService
+
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+@pytest.fixture(params=["sqlite-memory", "sqlite-wal-file", "postgresql"])
+def repo(request, tmp_path):
+    if request.param == "sqlite-memory":
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        reader = engine
+    elif request.param == "sqlite-wal-file":
+        url = f"sqlite:///{tmp_path / 'contract.db'}"
+        engine = create_db_engine(url, "wal")
+        reader = create_db_engine(url, "wal", read_only=True)
+    else:
+        if not POSTGRES_URL:
+            pytest.skip("TEST_POSTGRES_URL not set")
+        engine = create_db_engine(POSTGRES_URL)
+        reader = engine
+        Base.metadata.drop_all(engine)
+
+    Base.metadata.create_all(engine)
+    yield InventoryRepositoryDB(sessionmaker(bind=engine), sessionmaker(bind=reader))
+    if request.param == "postgresql":
+        Base.metadata.drop_all(engine)
+    engine.dispose()
+    reader.dispose()
+
+
+def new_item(sku, on_hand=10, reserved=0, min_qty=1, location="MAIN"):
+    return InventoryItem(
+        id=f"id-{sku}-{location}",
+        sku=SKU(sku),
+        on_hand=Quantity(on_hand),
+        reserved=Quantity(reserved),
+        threshold=Threshold(min_qty),
+        location=location,
+    )
+
+
+def test_save_and_get_roundtrip(repo):
+    repo.save(new_item("A01"))
+
+    item = repo.get_by_sku("A01")
+    assert item.on_hand.amount == 10
+    assert item.version == 1
+    assert repo.get_by_sku("NOPE") is None
+
+
+def test_reservation_diff_persisted(repo):
+    repo.save(new_item("A01"))
+    item = repo.get_by_sku("A01")
+    r1 = item.reserve("ORD1", Quantity(2))
+    item.reserve("ORD2", Quantity(3))
+    repo.save(item)
+
+    item = repo.get_by_sku("A01")
+    item.release(r1.id)
+    repo.save(item)
+
+    loaded = repo.get_by_sku("A01")
+    assert loaded.reserved.amount == 3
+    assert [r.order_id for r in loaded.reservations] == ["ORD2"]
+
+
+def test_stale_write_raises_conflict(repo):
+    repo.save(new_item("A01"))
+    first = repo.get_by_sku("A01")
+    second = repo.get_by_sku("A01")
+
+    first.increase(Quantity(1))
+    repo.save(first)
+    second.increase(Quantity(1))
+
+    with pytest.raises(ConcurrencyConflict):
+        repo.save(second)
+    assert repo.get_by_sku("A01").on_hand.amount == 11
+
+
+def test_concurrent_reservations_use_guarded_increment(repo):
+    repo.save(new_item("A01", on_hand=10))
+    first = repo.get_by_sku("A01")
+    second = repo.get_by_sku("A01")
+
+    first.reserve("ORD1", Quantity(4))
+    repo.save(first)
+    second.reserve("ORD2", Quantity(5))
+    repo.save(second)  # tidak conflict: stok masih cukup
+    assert second.reserved.amount == 9
+
+    third = repo.get_by_sku("A01")
+    fourth = repo.get_by_sku("A01")
+    third.reserve("ORD3", Quantity(1))
+    repo.save(third)
+    fourth.reserve("ORD4", Quantity(1))
+    with pytest.raises(ConcurrencyConflict):
+        repo.save(fourth)  # guard on_hand - reserved >= 1 gagal
+
+
+def test_get_many_and_save_many(repo):
+    repo.save_many([new_item("A01"), new_item("B01")])
+
+    items = repo.get_many_by_sku(["A01", "B01", "NOPE"])
+    assert set(items) == {"A01", "B01"}
+    for item in items.values():
+        item.reserve("ORD1", Quantity(1))
+    repo.save_many(list(items.values()))
+
+    assert repo.get_by_sku("B01").reserved.amount == 1
+
+
+def test_list_page_keyset_prefix_and_low_stock(repo):
+    repo.save_many([
+        new_item("A01"),
+        new_item("A02", on_hand=1, min_qty=5),
+        new_item("A03"),
+        new_item("B01", on_hand=0, min_qty=5),
+    ])
+
+    page = repo.list_page(limit=2, sku_prefix="A")
+    assert [i.sku.value for i in page] == ["A01", "A02"]
+    page = repo.list_page(after_sku="A02", limit=2, sku_prefix="A")
+    assert [i.sku.value for i in page] == ["A03"]
+
+    lows = repo.list_page(low_stock_only=True, include_reservations=False)
+    assert [i.sku.value for i in lows] == ["A02", "B01"]
+    assert [i.sku.value for i in repo.iter_items(low_stock_only=True, chunk_size=1)] == ["A02", "B01"]
+
+
+def test_low_stock_uses_generated_available_and_partial_index(repo):
+    repo.save_many([new_item("A01", on_hand=10, min_qty=5), new_item("A02", on_hand=2, min_qty=5), new_item("A03")])
+    a01 = repo.get_by_sku("A01")
+    a01.reserve("ORD1", Quantity(7))  # available 3 < min_qty 5
+    repo.save(a01)
+
+    with repo.session_factory() as db:
+        assert db.execute(text("SELECT available FROM inventory_items WHERE sku = 'A01'")).scalar() == 3
+    page = repo.list_page(limit=1, low_stock_only=True)
+    assert [i.sku.value for i in page] == ["A01"]
+    page = repo.list_page(after_sku="A01", limit=1, low_stock_only=True)
+    assert [i.sku.value for i in page] == ["A02"]
+    assert repo.list_page(after_sku="A02", limit=1, low_stock_only=True) == []
+
+    with repo.session_factory() as db:
+        if db.get_bind().dialect.name == "sqlite":
+            def plan(low_stock_only):
+                stmt = _select_items_page("A01", 10, low_stock_only=low_stock_only)
+                sql = str(stmt.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}))
+                return " ".join(str(row[-1]) for row in db.execute(text("EXPLAIN QUERY PLAN " + sql)))
+
+            # satu-satunya index lain yang diawali location adalah partial index,
+            # jadi pilihan planner tidak bergantung urutan CREATE INDEX
+            assert "ix_inventory_items_low_stock_location_sku" in plan(True)
+            assert "ux_inventory_items_sku_location" in plan(False)
+
+
+def test_moves_written_to_ledger(repo):
+    repo.save(new_item("A01"))
+    item = repo.get_by_sku("A01")
+    item.increase(Quantity(5), "INBOUND")
+    item.adjust(-2, "ADJ")
+    repo.save(item)
+
+    moves = repo.list_moves("A01")
+    assert [(m.movement_type, m.qty) for m in moves] == [("IN", 5), ("ADJUST", 2)]
+    rest = repo.list_moves("A01", after=(moves[0].created_at, moves[0].seq))
+    assert [m.id for m in rest] == [moves[1].id]
+
+
+def test_lock_for_update_saves_in_same_transaction(repo):
+    repo.save(new_item("A01"))
+    repo.row_lock = "wait"
+
+    with repo.lock_for_update("A01") as item:
+        item.decrease(Quantity(3))
+
+    assert repo.get_by_sku("A01").on_hand.amount == 7
+    with pytest.raises(ValueError, match="Item not found"):
+        with repo.lock_for_update("NOPE"):
+            pass
+
+
+def test_get_stats_reads_scalar_availability(repo):
+    repo.save_many([new_item("A01", on_hand=10), new_item("B01", on_hand=1, min_qty=5)])
+    item = repo.get_by_sku("A01")
+    item.reserve("ORD1", Quantity(4))
+    repo.save(item)
+
+    stats = repo.get_stats("A01")
+    assert (stats["available"], stats["low_stock"], stats["version"]) == (6, False, 2)
+    many = repo.get_stats_many(["A01", "B01", "NOPE"])
+    assert set(many) == {"A01", "B01"}
+    assert many["B01"]["low_stock"] is True
+
+
+def test_get_many_by_order(repo):
+    repo.save_many([new_item("A01"), new_item("B01"), new_item("C01")])
+    items = repo.get_many_by_sku(["A01", "B01", "C01"])
+    items["A01"].reserve("ORD1", Quantity(1))
+    items["B01"].reserve("ORD1", Quantity(2))
+    items["C01"].reserve("ORD2", Quantity(1))
+    repo.save_many(list(items.values()))
+
+    by_order = repo.get_many_by_order("ORD1")
+    assert set(by_order) == {("A01", "MAIN"), ("B01", "MAIN")}
+    for item in by_order.values():
+        item.release_by_order("ORD1")
+    repo.save_many(list(by_order.values()))
+
+    assert repo.get_many_by_order("ORD1") == {}
+    assert repo.get_by_sku("B01").reserved.amount == 0
+
+
+def test_release_expired_reservations_in_batches(repo):
+    repo.save_many([new_item("A01"), new_item("B01")])
+    items = repo.get_many_by_sku(["A01", "B01"])
+    expiring = items["A01"].reserve("ORD1", Quantity(2), ttl_seconds=60)
+    items["A01"].reserve("ORD2", Quantity(1), ttl_seconds=60)
+    items["B01"].reserve("ORD1", Quantity(3), ttl_seconds=60)
+    items["B01"].reserve("ORD3", Quantity(4))  # tanpa TTL
+    repo.save_many(list(items.values()))
+
+    later = expiring.expires_at + timedelta(seconds=1)
+    assert repo.oldest_expired_reservation(expiring.created_at) is None
+    assert repo.oldest_expired_reservation(later) == expiring.expires_at
+
+    assert repo.release_expired_reservations(later, limit=2)[0] == 2
+    count, by_sku = repo.release_expired_reservations(later, limit=2)
+    assert count == 1
+    assert repo.release_expired_reservations(later) == (0, {})
+
+    a01, b01 = repo.get_by_sku("A01"), repo.get_by_sku("B01")
+    assert a01.reserved.amount == 0 and len(a01.reservations) == 0
+    assert b01.reserved.amount == 4
+    assert [r.order_id for r in b01.reservations] == ["ORD3"]
+    assert b01.version == 3  # save + sweep
+
+
+def test_upsert_items_conflict_policies(repo):
+    repo.save(new_item("A01", on_hand=10, reserved=4))
+    records = [
+        {"sku": "A01", "on_hand": 20, "uom": "box", "min_qty": 2},
+        {"sku": "B01", "on_hand": 5, "uom": "pcs", "min_qty": 0},
+    ]
+    assert repo.upsert_items(records, "skip") == ({"B01": 1}, {})
+    assert repo.get_by_sku("A01").on_hand.amount == 10
+
+    # uom lain selagi ada reservation: baris ditolak dengan alasan, baris lain tetap ditulis
+    assert repo.upsert_items(records, "update") == ({"B01": 2}, {"A01": "uom cannot change while stock is reserved"})
+    assert repo.get_by_sku("A01").on_hand.uom == "pcs"
+
+    records[0]["uom"] = "pcs"
+    assert repo.upsert_items(records[:1], "update") == ({"A01": 2}, {})
+    a01 = repo.get_by_sku("A01")
+    assert (a01.on_hand.amount, a01.on_hand.uom, a01.threshold.min_qty, a01.reserved.amount) == (20, "pcs", 2, 4)
+
+    # on_hand yang berubah tercatat di ledger dan outbox, dalam transaksi yang sama
+    adjust = [m for m in repo.list_moves("A01") if m.movement_type == "ADJUST"]
+    assert [(m.qty, m.uom, m.reason) for m in adjust] == [(10, "pcs", "IMPORT")]
+    events = repo.list_events(sku="A01")[-2:]
+    assert [(e.event_type, e.on_hand, e.reserved, e.version) for e in events] == [
+        ("stock.adjusted", 20, 4, 2),
+        ("item.imported", 20, 4, 2),
+    ]
+    assert events[0].payload == {"move_id": adjust[0].id, "reason": "IMPORT", "delta": 10}
+
+    # on_hand di bawah reserved: baris tidak diubah, tidak ada di RETURNING
+    assert repo.upsert_items([{"sku": "A01", "on_hand": 3, "uom": "pcs", "min_qty": 0}], "update") == (
+        {}, {"A01": "on_hand is below the reserved quantity"}
+    )
+    assert repo.get_by_sku("A01").on_hand.amount == 20
+
+
+def test_import_items_chunks_and_reports_row_errors(repo):
+    repo.save(new_item("A01"))
+    service = InventoryService(repo)
+    lines = ["sku,on_hand,min_qty", "A01,5,1", "B01,7,2", "C01,-1,0", "D01,x,0", "", "E01,1,0", "B01,9,0"]
+    report = service.import_items(lines, "csv", "error", chunk_size=3)
+
+    assert (report.rows, report.inserted, report.updated, report.chunks) == (6, 2, 0, 2)
+    assert sorted((e["line"], e["error"]) for e in report.errors) == [
+        (2, "SKU already exists"),
+        (4, "on_hand cannot be negative"),
+        (5, "on_hand must be an integer"),
+        (8, "SKU already exists"),  # B01 lagi di chunk berikutnya: konflik dengan baris 3
+    ]
+    assert repo.get_by_sku("B01").threshold.min_qty == 2
+    assert repo.get_by_sku("E01").on_hand.amount == 1
+
+    report = service.import_items(["sku,on_hand,uom", "F01,1,   ", "G01,1, box "], "csv", "error")
+    assert report.errors == []
+    assert [repo.get_by_sku(sku).on_hand.uom for sku in ("F01", "G01")] == ["pcs", "box"]
+
+    with pytest.raises(ValueError):
+        service.import_items(["name,qty", "A01,1"], "csv", "skip")
+
+
+def test_locations_partition_stock_and_allocation_order(repo):
+    repo.save_many([
+        new_item("A01", on_hand=5),
+        new_item("A01", on_hand=9, location="WH2"),
+        new_item("A01", on_hand=9, location="WH3"),
+        new_item("B01", location="WH2"),
+    ])
+    with pytest.raises(IntegrityError):
+        repo.save(new_item("A01", on_hand=1, location="WH2"))  # (sku, location) unik
+
+    wh2 = repo.get_by_sku("A01", location="WH2")
+    expiring = wh2.reserve("ORD1", Quantity(2), ttl_seconds=60)
+    repo.save(wh2)
+    assert repo.get_by_sku("A01").reserved.amount == 0
+    assert [i.sku.value for i in repo.list_page(location="WH2")] == ["A01", "B01"]
+    assert [i.sku.value for i in repo.list_page()] == ["A01"]
+
+    assert [r["location"] for r in repo.list_locations("A01")] == ["WH3", "WH2", "MAIN"]
+    assert [r["location"] for r in repo.list_locations("A01", 6, limit=1)] == ["WH3"]
+    assert repo.list_locations("A01", 10) == []
+    assert repo.get_stats("A01", location="WH2")["available"] == 7
+
+    later = expiring.expires_at + timedelta(seconds=1)
+    assert repo.release_expired_reservations(later) == (1, {("A01", "WH2"): 2})
+    assert {row.location for row in repo.list_events(sku="A01")} == {"MAIN", "WH2", "WH3"}
+    assert [row.event_type for row in repo.list_events(location="WH2", sku="A01")][-1] == "reservation.expired"
+
+    assert repo.upsert_items([{"sku": "C01", "on_hand": 3, "uom": "pcs", "min_qty": 0}], "error", "WH3") == ({"C01": 1}, {})
+    assert repo.get_by_sku("C01") is None
+    assert repo.get_by_sku("C01", location="WH3").on_hand.amount == 3
+
+
+def test_mutations_write_outbox_events_in_same_commit(repo):
+    repo.save(new_item("A01"))
+    item = repo.get_by_sku("A01")
+    item.reserve("ORD1", Quantity(4), ttl_seconds=60)
+    item.increase(Quantity(5))
+    repo.save(item)
+
+    with pytest.raises(ConcurrencyConflict):
+        stale = repo.get_by_sku("A01")
+        stale.version = 1
+        stale.set_threshold(3)
+        repo.save(stale)  # rollback: event ikut tidak tertulis
+
+    events = repo.list_events()
+    assert [(e.event_type, e.version, e.on_hand, e.reserved) for e in events] == [
+        ("item.created", 1, 10, 0),
+        ("stock.reserved", 2, 15, 4),
+        ("stock.increased", 2, 15, 4),
+    ]
+    assert [e.seq for e in repo.list_events(after=events[0].seq, limit=1)] == [events[1].seq]
+    assert repo.list_events(sku="B01") == []
+
+    expires_at = item.reservations.for_order("ORD1")[0].expires_at
+    repo.release_expired_reservations(expires_at + timedelta(seconds=1))
+    repo.upsert_items([{"sku": "B01", "on_hand": 2, "uom": "pcs", "min_qty": 0}])
+    tail = repo.list_events(after=events[-1].seq)
+    assert [(e.sku, e.event_type, e.version, e.reserved) for e in tail] == [
+        ("A01", "reservation.expired", 3, 0),
+        ("B01", "item.imported", 1, 0),
+    ]
+    assert tail[1].payload == {"created": True, "uom": "pcs", "min_qty": 0}
+
+
+def test_outbox_inserts_serialized_only_on_postgresql():
+    stmt = _outbox_lock_stmt("postgresql")
+    assert "pg_advisory_xact_lock" in str(stmt.compile(dialect=postgresql.dialect()))
+    assert _outbox_lock_stmt("sqlite") is None  # satu writer: urutan commit = urutan seq
+
+
+def test_summary_counters_match_full_recount(repo):
+    repo.save_many([new_item("A01", on_hand=10, min_qty=1), new_item("B01", on_hand=3, min_qty=5)])
+    a01 = repo.get_by_sku("A01")
+    a01.reserve("ORD1", Quantity(6), ttl_seconds=60)
+    repo.save(a01)
+    a01.reserve("ORD2", Quantity(2))  # guarded increment dari state yang sudah tersimpan
+    repo.save(a01)
+    with repo.lock_for_update("B01") as b01:
+        b01.increase(Quantity(4))
+    repo.release_expired_reservations(a01.reservations.for_order("ORD1")[0].expires_at + timedelta(seconds=1))
+    repo.upsert_items([
+        {"sku": "C01", "on_hand": 1, "uom": "box", "min_qty": 2},
+        {"sku": "B01", "on_hand": 2, "uom": "box", "min_qty": 0},
+    ], "update")
+
+    summary = repo.get_summary(top=1)
+    assert (summary["sku_count"], summary["low_stock_count"]) == (3, 1)
+    assert summary["by_uom"] == [
+        {"uom": "box", "sku_count": 2, "on_hand": 3, "reserved": 0, "available": 3, "low_stock_count": 1},
+        {"uom": "pcs", "sku_count": 1, "on_hand": 10, "reserved": 2, "available": 8, "low_stock_count": 0},
+    ]
+    assert summary["top_reserved"] == [
+        {"sku": "A01", "location": "MAIN", "uom": "pcs", "on_hand": 10, "reserved": 2, "available": 8}
+    ]
+    assert repo.reconcile_summary() == {}
+
+
+def test_guarded_reserve_racing_threshold_keeps_low_stock_exact(repo):
+    repo.save(new_item("A01", on_hand=10, min_qty=1))
+    stale = repo.get_by_sku("A01")  # snapshot min_qty = 1
+    other = repo.get_by_sku("A01")
+    other.set_threshold(8)
+    repo.save(other)
+
+    stale.reserve("ORD1", Quantity(4))  # guarded increment: lolos walau snapshot basi
+    repo.save(stale)
+
+    summary = repo.get_summary(top=0)
+    assert (summary["low_stock_count"], summary["by_uom"][0]["reserved"]) == (1, 4)
+    assert repo.reconcile_summary() == {}
+
+
+def test_reconcile_summary_corrects_drift(repo):
+    repo.save_many([new_item("A01", on_hand=10), new_item("B01", on_hand=5)])
+    with repo.session_factory() as db:
+        db.execute(text("UPDATE inventory_items SET on_hand = on_hand + 7 WHERE sku = 'A01'"))
+        db.commit()
+
+    assert repo.get_summary()["by_uom"][0]["on_hand"] == 15
+    assert repo.reconcile_summary() == {"pcs": {"on_hand": 7}}
+    assert repo.get_summary()["by_uom"][0]["on_hand"] == 22
+    assert repo.reconcile_summary() == {}
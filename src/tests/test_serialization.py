@@ -0,0 +1,56 @@
+import json
+from datetime import datetime
+
+from src import serialization
+from src.domain.inventory import InventoryItem, Quantity, SKU, Threshold
+from src.serialization import events_json, events_sse, item_dicts, items_json, items_ndjson, to_item_dto
+
+
+def make_item():
+    item = InventoryItem("id-1", SKU("A01"), Quantity(10, "box"), Quantity(0, "box"), Threshold(8))
+    item.reserve("ORD1", Quantity(3, "box"))
+    item.reserve("ORD2", Quantity(1, "box"), ttl_seconds=60)
+    return item
+
+
+def rows_of(item):
+    rows = [(item.id, item.sku.value, item.on_hand.amount, item.reserved.amount,
+             item.available.amount, item.on_hand.uom, item.threshold.min_qty, item.location)]
+    res_rows = [(item.sku.value, r.id, r.order_id, r.reserved_qty.amount, r.expires_at) for r in item.reservations]
+    return rows, res_rows
+
+
+def test_fast_path_matches_dto_output():
+    item = make_item()
+    rows, res_rows = rows_of(item)
+
+    assert item_dicts(rows, res_rows) == [to_item_dto(item).model_dump()]
+    assert json.loads(items_json(rows, res_rows)) == [json.loads(to_item_dto(item).model_dump_json())]
+    assert items_json(rows) == items_json(rows, [])
+    assert json.loads(items_json(rows))[0]["reservations"] == []
+
+
+def test_ndjson_and_stdlib_fallback(monkeypatch):
+    rows, res_rows = rows_of(make_item())
+    fast = items_ndjson(rows * 2, res_rows)
+
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert items_ndjson(rows * 2, res_rows) == fast
+    assert fast.count(b"\n") == 2
+
+
+def test_events_json_and_sse_frames():
+    rows = [
+        (7, "ev-7", "A01", "stock.reserved", 3, 10, 4, {"order_id": "ORD1", "qty": 4}, datetime(2024, 1, 2, 3, 4, 5),
+         "MAIN"),
+        (8, "ev-8", "A01", "threshold.changed", 4, 10, 4, {"min_qty": 2}, datetime(2024, 1, 2, 3, 4, 6), "WH2"),
+    ]
+    events = json.loads(events_json(rows))
+    assert events[0]["available"] == 6 and events[0]["type"] == "stock.reserved"
+    assert events[0]["created_at"] == "2024-01-02T03:04:05"
+    assert [e["location"] for e in events] == ["MAIN", "WH2"]
+
+    frames = events_sse(rows).decode().split("\n\n")
+    assert frames[-1] == ""
+    assert frames[1].splitlines()[:2] == ["id: 8", "event: threshold.changed"]
+    assert json.loads(frames[1].splitlines()[2].removeprefix("data: ")) == events[1]